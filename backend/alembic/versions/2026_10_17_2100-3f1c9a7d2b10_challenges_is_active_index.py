@@ -0,0 +1,48 @@
+"""Partial index on challenges.is_active
+
+Tables are created by create_tables() at startup, which skips tables
+that already exist. This revision adds the index to databases created
+before it; on a fresh database it does nothing and create_tables()
+builds the current schema.
+
+Revision ID: 3f1c9a7d2b10
+Revises: 
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b10'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table("challenges"):
+        return
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_challenges_is_active",
+            "challenges",
+            ["is_active"],
+            postgresql_where=sa.text("is_active"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_challenges_is_active",
+            table_name="challenges",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
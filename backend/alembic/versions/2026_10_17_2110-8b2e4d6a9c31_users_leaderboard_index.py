@@ -0,0 +1,42 @@
+"""Composite leaderboard index on users
+
+Revision ID: 8b2e4d6a9c31
+Revises: 3f1c9a7d2b10
+Create Date: 2026-10-17 21:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4d6a9c31'
+down_revision: Union[str, None] = '3f1c9a7d2b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table("users"):
+        return
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_leaderboard",
+            "users",
+            ["total_points", "current_streak", "longest_streak"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_leaderboard",
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,47 @@
+"""Add users.total_submissions, backfilled from submissions
+
+Revision ID: c4a7e1f08d52
+Revises: 8b2e4d6a9c31
+Create Date: 2026-10-17 21:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a7e1f08d52'
+down_revision: Union[str, None] = '8b2e4d6a9c31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("users"):
+        return
+    if "total_submissions" in {column["name"] for column in inspector.get_columns("users")}:
+        return
+    
+    op.add_column(
+        "users",
+        sa.Column("total_submissions", sa.Integer(), server_default="0", nullable=False)
+    )
+    op.execute(
+        """
+        UPDATE users
+        SET total_submissions = counts.submissions
+        FROM (
+            SELECT user_id, COUNT(*) AS submissions
+            FROM submissions
+            GROUP BY user_id
+        ) AS counts
+        WHERE users.id = counts.user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "total_submissions")
@@ -0,0 +1,46 @@
+"""Partial index on users.last_completed_date for live streaks
+
+Serves expire_stale_streaks, which only looks at users still holding a
+streak.
+
+Revision ID: 5d9f3b7e1a64
+Revises: c4a7e1f08d52
+Create Date: 2026-10-17 21:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d9f3b7e1a64'
+down_revision: Union[str, None] = 'c4a7e1f08d52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table("users"):
+        return
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_live_streaks",
+            "users",
+            ["last_completed_date"],
+            postgresql_where=sa.text("current_streak > 0"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_live_streaks",
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,90 @@
+"""Add users.completion_bitmap, backfilled from submissions
+
+Bit n is the day COMPLETION_EPOCH + n, in byte n / 8 at position n % 8,
+least significant bit first: the layout Postgres set_bit uses and
+app.services.completion reads.
+
+Revision ID: e7b3a5c9d2f8
+Revises: 5d9f3b7e1a64
+Create Date: 2026-10-17 21:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3a5c9d2f8'
+down_revision: Union[str, None] = '5d9f3b7e1a64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# app.services.completion.COMPLETION_EPOCH at the time of this revision
+COMPLETION_EPOCH = "2020-01-01"
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("users"):
+        return
+    if "completion_bitmap" in {column["name"] for column in inspector.get_columns("users")}:
+        return
+    
+    op.add_column(
+        "users",
+        sa.Column(
+            "completion_bitmap",
+            sa.LargeBinary(),
+            server_default=sa.text("''::bytea"),
+            nullable=False
+        )
+    )
+    # Set bits are summed into bytes, which are hex-encoded, zero-filled
+    # up to each user's last completed day and decoded as one bytea
+    op.execute(
+        sa.text(
+            """
+            WITH days AS (
+                SELECT DISTINCT submissions.user_id,
+                       challenges.active_date - CAST(:epoch AS date) AS day_index
+                FROM submissions
+                JOIN challenges ON challenges.id = submissions.challenge_id
+                WHERE challenges.active_date >= CAST(:epoch AS date)
+            ),
+            bytes AS (
+                SELECT user_id, day_index / 8 AS byte_index, SUM(1 << (day_index % 8)) AS value
+                FROM days
+                GROUP BY user_id, day_index / 8
+            ),
+            bitmaps AS (
+                SELECT spans.user_id,
+                       decode(
+                           string_agg(
+                               lpad(to_hex(COALESCE(bytes.value, 0)), 2, '0'),
+                               '' ORDER BY positions.byte_index
+                           ),
+                           'hex'
+                       ) AS bitmap
+                FROM (
+                    SELECT user_id, MAX(byte_index) AS last_byte
+                    FROM bytes
+                    GROUP BY user_id
+                ) AS spans
+                CROSS JOIN LATERAL generate_series(0, spans.last_byte) AS positions(byte_index)
+                LEFT JOIN bytes
+                    ON bytes.user_id = spans.user_id AND bytes.byte_index = positions.byte_index
+                GROUP BY spans.user_id
+            )
+            UPDATE users
+            SET completion_bitmap = bitmaps.bitmap
+            FROM bitmaps
+            WHERE users.id = bitmaps.user_id
+            """
+        ).bindparams(epoch=COMPLETION_EPOCH)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "completion_bitmap")
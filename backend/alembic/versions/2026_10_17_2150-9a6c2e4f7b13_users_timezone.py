@@ -0,0 +1,37 @@
+"""Add users.timezone
+
+Existing users keep playing on UTC days, as before the column existed.
+
+Revision ID: 9a6c2e4f7b13
+Revises: e7b3a5c9d2f8
+Create Date: 2026-10-17 21:50:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a6c2e4f7b13'
+down_revision: Union[str, None] = 'e7b3a5c9d2f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("users"):
+        return
+    if "timezone" in {column["name"] for column in inspector.get_columns("users")}:
+        return
+    
+    op.add_column(
+        "users",
+        sa.Column("timezone", sa.String(length=64), server_default="UTC", nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "timezone")
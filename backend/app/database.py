@@ -2,26 +2,142 @@
 Database connection and session management.
 Uses async SQLAlchemy for non-blocking database operations.
 """
+import asyncio
+import time
+from typing import Any, Callable, Optional
+
+import asyncpg
+from sqlalchemy import event, exc
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, Session
 from app.config import settings
 
 
+class PoolMetrics:
+    """Counters describing connection pool pressure."""
+    
+    def __init__(self):
+        self.checkouts = 0
+        self.checked_out_max = 0
+        self.overflow_events = 0
+        self.hold_seconds_total = 0.0
+        self.hold_seconds_max = 0.0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+    
+    def record_wait(self, waited: float) -> None:
+        self.waits += 1
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+    
+    def as_dict(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "checked_out_max": self.checked_out_max,
+            "overflow_events": self.overflow_events,
+            "hold_seconds_avg": round(self.hold_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+            "hold_seconds_max": round(self.hold_seconds_max, 6),
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "wait_seconds_avg": round(self.wait_seconds_total / self.waits, 6) if self.waits else 0.0,
+            "wait_seconds_max": round(self.wait_seconds_max, 6),
+            "timeouts": self.timeouts,
+        }
+
+
+pool_metrics = PoolMetrics()
+
+
 # Create async engine
+pool_size, max_overflow = settings.db_pool_limits
+
 engine_args = {
     "echo": settings.DEBUG,
     "future": True,
+    "pool_size": pool_size,
+    "max_overflow": max_overflow,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+
+connect_args = {
+    "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
 }
 
 # Add SSL for production (Render/Neon)
 if not settings.DEBUG:
-    engine_args["connect_args"] = {"ssl": "require"}
+    connect_args["ssl"] = "require"
+
+engine_args["connect_args"] = connect_args
 
 engine = create_async_engine(
     settings.DATABASE_URL,
     **engine_args
 )
 
+# Pool pressure metrics, from the pool's public events and counters
+_CHECKED_OUT_AT_KEY = "checked_out_at"
+
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _record_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    pool = engine.sync_engine.pool
+    checked_out = pool.checkedout()
+    pool_metrics.checkouts += 1
+    pool_metrics.checked_out_max = max(pool_metrics.checked_out_max, checked_out)
+    # Served by a connection beyond pool_size
+    if pool.overflow() > 0 and checked_out > pool.size():
+        pool_metrics.overflow_events += 1
+    connection_record.info[_CHECKED_OUT_AT_KEY] = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "checkin")
+def _record_checkin(dbapi_connection, connection_record) -> None:
+    checked_out_at = connection_record.info.pop(_CHECKED_OUT_AT_KEY, None)
+    if checked_out_at is not None:
+        held = time.perf_counter() - checked_out_at
+        pool_metrics.hold_seconds_total += held
+        pool_metrics.hold_seconds_max = max(pool_metrics.hold_seconds_max, held)
+
+
+# The pool has no event before a checkout starts waiting, so the wait is
+# timed per session: from the statement or flush that needs a connection
+# (the transaction may have begun earlier, e.g. on add()) until
+# after_begin fires with the connection
+_WAIT_STARTED_KEY = "pool_wait_started"
+
+
+@event.listens_for(Session, "after_transaction_create")
+def _start_wait(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info[_WAIT_STARTED_KEY] = time.perf_counter()
+
+
+def _restart_wait(session: Session) -> None:
+    if _WAIT_STARTED_KEY in session.info:
+        session.info[_WAIT_STARTED_KEY] = time.perf_counter()
+
+
+@event.listens_for(Session, "before_flush")
+def _restart_wait_on_flush(session: Session, flush_context, instances) -> None:
+    _restart_wait(session)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _restart_wait_on_execute(orm_execute_state) -> None:
+    _restart_wait(orm_execute_state.session)
+
+
+@event.listens_for(Session, "after_begin")
+def _end_wait(session: Session, transaction, connection) -> None:
+    started = session.info.pop(_WAIT_STARTED_KEY, None)
+    if started is not None and connection.engine is engine.sync_engine:
+        pool_metrics.record_wait(time.perf_counter() - started)
+
+
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -46,6 +162,10 @@ async def get_db():
         try:
             yield session
             await session.commit()
+        except exc.TimeoutError:
+            pool_metrics.timeouts += 1
+            await session.rollback()
+            raise
         except Exception:
             await session.rollback()
             raise
@@ -53,6 +173,47 @@ async def get_db():
             await session.close()
 
 
+# Session.info key holding callbacks for the pending commit
+_AFTER_COMMIT_KEY = "after_commit_callbacks"
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """
+    Run `callback` once the session's current transaction commits.
+    
+    For in-process side effects of a write (cache invalidation, rank
+    index updates) that must not be seen before the write is: applied
+    earlier, a concurrent request could re-cache the old row, and a
+    failed commit would leave them applied. Callbacks are dropped if the
+    transaction rolls back.
+    """
+    session.sync_session.info.setdefault(_AFTER_COMMIT_KEY, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session: Session) -> None:
+    for callback in session.info.pop(_AFTER_COMMIT_KEY, ()):
+        callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_after_commit(session: Session) -> None:
+    session.info.pop(_AFTER_COMMIT_KEY, None)
+
+
+def get_pool_status() -> dict:
+    """Current pool occupancy plus cumulative pressure metrics."""
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": max_overflow,
+        **pool_metrics.as_dict(),
+    }
+
+
 async def create_tables():
     """Create all database tables."""
     async with engine.begin() as conn:
@@ -63,3 +224,82 @@ async def drop_tables():
     """Drop all database tables."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+
+
+async def connect_raw() -> asyncpg.Connection:
+    """
+    Open a dedicated asyncpg connection outside the pool.
+    
+    For session-scoped state that must not be shared with pooled
+    sessions, such as advisory locks and LISTEN (see
+    DedicatedConnection). The caller closes it.
+    """
+    url = engine.url.set(drivername="postgresql")
+    return await asyncpg.connect(
+        url.render_as_string(hide_password=False),
+        ssl=connect_args.get("ssl")
+    )
+
+
+class DedicatedConnection:
+    """
+    The one connection per worker kept outside the pool.
+    
+    Shared by everything that needs session-scoped state: the event bus
+    LISTENs on it and the scheduler holds its advisory lock on it. An
+    asyncpg connection runs one query at a time, so queries are
+    serialized. The connection opens on first use and reopens on the
+    next use after close(); `generation` counts the opens, and state set
+    up on an earlier generation (listeners, locks) is gone.
+    """
+    
+    def __init__(self):
+        self.generation = 0
+        self._conn: Optional[asyncpg.Connection] = None
+        self._lock = asyncio.Lock()
+    
+    @property
+    def is_open(self) -> bool:
+        return self._conn is not None and not self._conn.is_closed()
+    
+    async def _ensure(self) -> asyncpg.Connection:
+        if not self.is_open:
+            self._conn = await connect_raw()
+            self.generation += 1
+        return self._conn
+    
+    async def fetchval(self, query: str, *args: Any) -> tuple[Any, int]:
+        """
+        Run a query, connecting first if needed.
+        
+        Returns:
+            The value, and the generation of the connection it ran on
+        """
+        async with self._lock:
+            conn = await self._ensure()
+            return await conn.fetchval(query, *args), self.generation
+    
+    async def add_listener(self, channel: str, callback: Callable) -> int:
+        """LISTEN on `channel`; returns the generation the listener lives on."""
+        async with self._lock:
+            conn = await self._ensure()
+            await conn.add_listener(channel, callback)
+            return self.generation
+    
+    async def close(self) -> None:
+        """
+        Close the connection, releasing its locks and listeners.
+        
+        The next use opens a new one, so this also recovers from a
+        connection that failed.
+        """
+        async with self._lock:
+            if self._conn is not None:
+                try:
+                    await self._conn.close()
+                except Exception:
+                    self._conn.terminate()
+                self._conn = None
+
+
+dedicated_connection = DedicatedConnection()
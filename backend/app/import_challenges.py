@@ -0,0 +1,59 @@
+"""
+Bulk import challenges from a JSONL or CSV file.
+Run with: python -m app.import_challenges FILE [--format jsonl|csv] [--dry-run] [--batch-size N]
+"""
+import argparse
+import asyncio
+import sys
+
+from app.config import settings
+from app.database import AsyncSessionLocal, create_tables
+from app.services.challenge_import import IMPORT_FORMATS, detect_format, import_challenges
+
+
+async def main(path: str, fmt: str | None, dry_run: bool, batch_size: int, max_errors: int) -> int:
+    """Run the import, print a summary and return the exit code."""
+    await create_tables()
+    
+    fmt = fmt or detect_format(path)
+    with open(path, "rb") as file:
+        async with AsyncSessionLocal() as db:
+            report = await import_challenges(
+                db,
+                file,
+                fmt,
+                batch_size=batch_size,
+                dry_run=dry_run,
+                max_errors=max_errors
+            )
+    
+    if not report.ok:
+        mode = "REJECTED - nothing written"
+    elif report.dry_run:
+        mode = "DRY RUN - nothing written"
+    else:
+        mode = "Challenges imported"
+    print(mode)
+    print(f"  Rows read:     {report.rows_read}")
+    print(f"  Rows imported: {report.rows_imported}")
+    print(f"  Invalid rows:  {report.invalid_rows}")
+    print(f"  Collisions:    {report.collisions}")
+    print(f"  Elapsed:       {report.elapsed_seconds:.2f}s ({report.rows_per_second:.0f} rows/s)")
+    
+    if report.errors:
+        print("\nProblems (line: message):")
+        for line_no, message in report.errors:
+            print(f"  {line_no if line_no is not None else '-'}: {message}")
+    
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("file", help="Path to a .jsonl or .csv file")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="File format (default: from the extension)")
+    parser.add_argument("--dry-run", action="store_true", help="Validate and check collisions without writing")
+    parser.add_argument("--batch-size", type=int, default=settings.CHALLENGE_IMPORT_BATCH_SIZE, help="Rows per COPY batch")
+    parser.add_argument("--max-errors", type=int, default=20, help="Problems to print")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.file, args.format, args.dry_run, args.batch_size, args.max_errors)))
@@ -4,14 +4,21 @@ Main application entry point.
 """
 import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.database import create_tables
-from app.routers import auth_router, challenge_router, user_router
-from app.services.scheduler import start_scheduler, stop_scheduler
-from app.services.challenge import activate_today_challenge
+from app.database import create_tables, dedicated_connection, get_pool_status
+from app.middleware import CompressionMiddleware
+from app.serialization import default_response_class
+from app.routers import admin_router, auth_router, challenge_router, user_router
+from app.routers.admin import require_admin
+from app.services.scheduler import scheduler_leadership
+from app.services.events import event_bus
+from app.services.invalidation import register_invalidation_handlers
+from app.services.auth import shutdown_hashing_pool
+from app.services.ranking import load_rank_index
+from app.services.submission_queue import submission_queue
 from app.database import AsyncSessionLocal
 
 # Configure logging
@@ -35,19 +42,32 @@ async def lifespan(app: FastAPI):
     await create_tables()
     logger.info("Database tables created")
     
-    # Activate today's challenge
+    # Build the in-memory rank index
     async with AsyncSessionLocal() as db:
-        await activate_today_challenge(db)
-    logger.info("Today's challenge activated")
+        await load_rank_index(db)
+    logger.info("Rank index loaded")
     
-    # Start scheduler for daily jobs
-    start_scheduler()
+    # Listen for changes made by other workers
+    register_invalidation_handlers(event_bus)
+    await event_bus.start()
+    
+    # Elect the worker that activates today's challenge and runs daily jobs
+    await scheduler_leadership.start()
+    
+    # Start the submission write-behind queue
+    if settings.SUBMISSION_WRITE_BEHIND:
+        await submission_queue.start()
     
     yield
     
     # Shutdown
     logger.info("Shutting down Daily Challenge App...")
-    stop_scheduler()
+    if settings.SUBMISSION_WRITE_BEHIND:
+        await submission_queue.stop()
+    await scheduler_leadership.stop()
+    await event_bus.stop()
+    await dedicated_connection.close()
+    shutdown_hashing_pool()
 
 
 # Create FastAPI application
@@ -56,6 +76,7 @@ app = FastAPI(
     description="A brutalist daily challenge application. One challenge per day. No excuses.",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=default_response_class(),
     docs_url="/docs",
     redoc_url="/redoc",
 )
@@ -69,10 +90,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses (added after CORS, so it wraps the CORS middleware)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+)
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(challenge_router)
 app.include_router(user_router)
+app.include_router(admin_router)
 
 
 @app.get("/", tags=["Root"])
@@ -89,3 +117,9 @@ async def root():
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/health/pool", tags=["Health"], dependencies=[Depends(require_admin)])
+async def pool_status():
+    """Database connection pool metrics for this worker (requires X-Admin-Key)."""
+    return get_pool_status()
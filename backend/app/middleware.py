@@ -0,0 +1,125 @@
+"""
+ASGI middleware for the FastAPI application.
+"""
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.services.compression import brotli, compress, negotiate_encoding
+
+# Content types worth compressing
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+class _StreamCompressor:
+    """Incremental compressor for bodies sent in several chunks."""
+    
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            # wbits=31 produces a gzip container
+            self._compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+        self._encoding = encoding
+    
+    def process(self, chunk: bytes) -> bytes:
+        if self._encoding == "br":
+            return self._compressor.process(chunk)
+        return self._compressor.compress(chunk)
+    
+    def finish(self) -> bytes:
+        if self._encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with gzip or brotli, as negotiated by the client.
+    
+    Skips bodies smaller than `minimum_size`, non-text content types and
+    responses a handler already encoded (e.g. precompressed payloads).
+    Written as plain ASGI so small responses are buffered only until their
+    first body message.
+    """
+    
+    def __init__(self, app: ASGIApp, minimum_size: int = 500):
+        self.app = app
+        self.minimum_size = minimum_size
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        start: Optional[Message] = None
+        compressor: Optional[_StreamCompressor] = None
+        passthrough = False
+        
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, compressor, passthrough
+            
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    "content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    # Hold the start until the first chunk shows the body size
+                    start = message
+                return
+            
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                if not more_body and len(body) < self.minimum_size:
+                    # Small single-chunk body: send unchanged
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                # The encoded body is a different representation, so a
+                # strong validator becomes weak (as nginx does)
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = "W/" + etag
+                if not more_body:
+                    body = compress(body, encoding)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                
+                # Streaming body: compress chunk by chunk
+                del headers["Content-Length"]
+                compressor = _StreamCompressor(encoding)
+                await send(start)
+                start = None
+            
+            chunk = compressor.process(body)
+            if not more_body:
+                chunk += compressor.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        
+        await self.app(scope, receive, send_wrapper)
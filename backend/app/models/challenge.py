@@ -4,7 +4,7 @@ Challenge model for daily challenges.
 import uuid
 from datetime import datetime, date
 from enum import Enum as PyEnum
-from sqlalchemy import String, Text, Date, DateTime, Boolean, Enum
+from sqlalchemy import String, Text, Date, DateTime, Boolean, Enum, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.database import Base
@@ -29,6 +29,11 @@ class Challenge(Base):
     
     __tablename__ = "challenges"
     
+    # Partial index so rotation finds the active row without a table scan
+    __table_args__ = (
+        Index("ix_challenges_is_active", "is_active", postgresql_where=text("is_active")),
+    )
+    
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
@@ -75,11 +80,11 @@ class Challenge(Base):
         nullable=False
     )
     
-    # Relationships
+    # Relationships (never loaded implicitly - pass selectinload() to opt in)
     submissions: Mapped[list["Submission"]] = relationship(
         "Submission",
         back_populates="challenge",
-        lazy="selectin"
+        lazy="raise"
     )
     
     def get_points(self) -> int:
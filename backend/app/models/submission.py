@@ -75,14 +75,16 @@ class Submission(Base):
         nullable=False
     )
     
-    # Relationships
+    # Relationships (never loaded implicitly - pass selectinload() to opt in)
     user: Mapped["User"] = relationship(
         "User",
-        back_populates="submissions"
+        back_populates="submissions",
+        lazy="raise"
     )
     challenge: Mapped["Challenge"] = relationship(
         "Challenge",
-        back_populates="submissions"
+        back_populates="submissions",
+        lazy="raise"
     )
     
     def __repr__(self) -> str:
@@ -3,7 +3,7 @@ User model for authentication and profile data.
 """
 import uuid
 from datetime import datetime, date
-from sqlalchemy import String, Integer, Date, DateTime
+from sqlalchemy import String, Integer, Date, DateTime, Index, LargeBinary, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.database import Base
@@ -14,6 +14,18 @@ class User(Base):
     
     __tablename__ = "users"
     
+    # Leads with the leaderboard's first sort key (scanned backwards for
+    # DESC), so top-N reads stop after about N index entries and only
+    # sort ties on points. Live streaks by last completion, for expiry.
+    __table_args__ = (
+        Index("ix_users_leaderboard", "total_points", "current_streak", "longest_streak"),
+        Index(
+            "ix_users_live_streaks",
+            "last_completed_date",
+            postgresql_where=text("current_streak > 0")
+        ),
+    )
+    
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
@@ -52,10 +64,30 @@ class User(Base):
         default=0,
         nullable=False
     )
+    total_submissions: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        server_default="0",
+        nullable=False
+    )
     last_completed_date: Mapped[date | None] = mapped_column(
         Date,
         nullable=True
     )
+    # IANA timezone whose calendar days the user plays on
+    timezone: Mapped[str] = mapped_column(
+        String(64),
+        default="UTC",
+        server_default="UTC",
+        nullable=False
+    )
+    # One bit per completed day (see app.services.completion)
+    completion_bitmap: Mapped[bytes] = mapped_column(
+        LargeBinary,
+        default=b"",
+        server_default=text("''::bytea"),
+        nullable=False
+    )
     
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(
@@ -64,11 +96,11 @@ class User(Base):
         nullable=False
     )
     
-    # Relationships
+    # Relationships (never loaded implicitly - pass selectinload() to opt in)
     submissions: Mapped[list["Submission"]] = relationship(
         "Submission",
         back_populates="user",
-        lazy="selectin"
+        lazy="raise"
     )
     
     def __repr__(self) -> str:
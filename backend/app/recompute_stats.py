@@ -0,0 +1,41 @@
+"""
+Recompute every user's streak and points from their submissions.
+Run with: python -m app.recompute_stats [--dry-run] [--chunk-size N]
+"""
+import argparse
+import asyncio
+
+from app.services.recompute import recompute_user_stats
+
+
+async def main(dry_run: bool, chunk_size: int, max_examples: int):
+    """Run the recomputation and print a summary."""
+    report = await recompute_user_stats(
+        dry_run=dry_run,
+        chunk_size=chunk_size,
+        max_examples=max_examples
+    )
+    
+    mode = "DRY RUN - nothing written" if report.dry_run else "Stats written"
+    print(f"{mode}")
+    print(f"  Submissions scanned: {report.submissions_scanned}")
+    print(f"  Users scanned:       {report.users_scanned}")
+    print(f"  Users changed:       {report.users_changed}")
+    if report.users_skipped:
+        print(f"  Users skipped:       {report.users_skipped} (updated during the run - rerun to pick them up)")
+    print(f"  Users reset:         {report.users_reset}")
+    print(f"  Elapsed:             {report.elapsed_seconds:.2f}s")
+    
+    if report.examples:
+        print("\nSample differences (user, column: stored -> recomputed):")
+        for user_id, column, old_value, new_value in report.examples:
+            print(f"  {user_id} {column}: {old_value} -> {new_value}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="Report differences without writing")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="Submissions per chunk")
+    parser.add_argument("--max-examples", type=int, default=20, help="Differences to print")
+    args = parser.parse_args()
+    asyncio.run(main(args.dry_run, args.chunk_size, args.max_examples))
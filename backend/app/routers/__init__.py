@@ -1,6 +1,7 @@
 # Routers package
+from app.routers.admin import router as admin_router
 from app.routers.auth import router as auth_router
 from app.routers.challenge import router as challenge_router
 from app.routers.user import router as user_router
 
-__all__ = ["auth_router", "challenge_router", "user_router"]
+__all__ = ["admin_router", "auth_router", "challenge_router", "user_router"]
@@ -0,0 +1,65 @@
+"""
+Admin router for content management.
+
+Every route requires the X-Admin-Key header to match ADMIN_API_KEY; when
+ADMIN_API_KEY is unset the routes are disabled.
+"""
+import hmac
+
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, UploadFile, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import get_db
+from app.services.challenge_import import IMPORT_FORMATS, detect_format, import_challenges
+
+
+async def require_admin(x_admin_key: str | None = Header(None)) -> None:
+    """Dependency rejecting requests without the admin API key."""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not Found"
+        )
+    if x_admin_key is None or not hmac.compare_digest(x_admin_key, settings.ADMIN_API_KEY):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid admin key"
+        )
+
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+@router.post("/challenges/import")
+async def import_challenges_file(
+    file: UploadFile = File(...),
+    format: str | None = Query(None, pattern=f"^({'|'.join(IMPORT_FORMATS)})$"),
+    dry_run: bool = Query(False),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Bulk import challenges from a JSONL or CSV file.
+    
+    - **file**: One challenge per JSONL line, or CSV with a header row
+    - **format**: jsonl or csv (default: from the file extension)
+    - **dry_run**: Validate and check date collisions without writing
+    
+    Nothing is imported if any row is invalid or reuses an active_date;
+    the report lists the first problems found.
+    """
+    try:
+        fmt = format or detect_format(file.filename)
+        report = await import_challenges(db, file.file, fmt, dry_run=dry_run)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    if not report.ok:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=report.to_dict()
+        )
+    return report.to_dict()
@@ -2,18 +2,20 @@
 Authentication router for user registration and login.
 """
 from datetime import timedelta
+from functools import partial
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.database import get_db
+from app.database import after_commit, get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin, UserResponse, Token
 from app.services.auth import (
-    get_password_hash,
+    get_password_hash_async,
     create_access_token,
     authenticate_user
 )
+from app.services.ranking import rank_index
 from app.config import settings
 
 
@@ -31,6 +33,7 @@ async def register(
     - **username**: Unique username (3-50 characters, alphanumeric + underscore)
     - **email**: Valid email address
     - **password**: Password (minimum 6 characters)
+    - **timezone**: IANA timezone whose days the user plays on (default UTC)
     """
     # Check if username already exists
     result = await db.execute(
@@ -56,15 +59,18 @@ async def register(
     user = User(
         username=user_data.username,
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await get_password_hash_async(user_data.password),
+        timezone=user_data.timezone,
         current_streak=0,
         longest_streak=0,
-        total_points=0
+        total_points=0,
+        total_submissions=0
     )
     
     db.add(user)
     await db.flush()
     await db.refresh(user)
+    after_commit(db, partial(rank_index.add, user.total_points))
     
     return user
 
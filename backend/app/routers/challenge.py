@@ -1,21 +1,37 @@
 """
 Challenge router for daily challenge operations.
+
+"Today" is always the current user's local date (see
+app.services.local_day).
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.models.user import User
 from app.schemas.challenge import ChallengeResponse, ChallengeHistory
 from app.schemas.submission import SubmissionCreate, SubmissionResponse
-from app.services.auth import get_current_user
+from app.services.auth import get_current_principal, Principal
 from app.services.challenge import (
-    get_today_challenge,
+    get_today_challenge_snapshot,
     get_challenge_history,
     get_challenge_by_id,
-    check_user_submitted
+    count_past_challenges,
+    encode_history_cursor,
+    decode_history_cursor
+)
+from app.services.challenge_payload import challenge_json, history_json, today_etag
+from app.services.completion import is_completed
+from app.services.local_day import local_today
+from app.services.http_cache import (
+    PRIVATE_REVALIDATE,
+    make_etag,
+    etag_matches,
+    not_modified,
+    cached_json_response
 )
 from app.services.submission import create_submission
+from app.services.submission_queue import submission_queue, SubmissionQueueFull
+from app.config import settings
 
 
 router = APIRouter(prefix="/challenge", tags=["Challenges"])
@@ -23,15 +39,19 @@ router = APIRouter(prefix="/challenge", tags=["Challenges"])
 
 @router.get("/today", response_model=ChallengeResponse)
 async def get_todays_challenge(
-    current_user: User = Depends(get_current_user),
+    if_none_match: str | None = Header(None),
+    accept_encoding: str | None = Header(None),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Get today's active challenge.
     
-    Returns the current day's challenge with submission status.
+    Returns the challenge for the user's local day with submission
+    status. Supports If-None-Match; the ETag changes with the challenge
+    and the user's submission state.
     """
-    challenge = await get_today_challenge(db)
+    challenge = await get_today_challenge_snapshot(db, local_today(current_user.timezone))
     
     if not challenge:
         raise HTTPException(
@@ -40,20 +60,18 @@ async def get_todays_challenge(
         )
     
     # Check if user has submitted
-    user_submitted = await check_user_submitted(db, current_user.id, challenge.id)
+    user_submitted = is_completed(current_user.completion_bitmap, challenge.active_date)
     
-    return ChallengeResponse(
-        id=challenge.id,
-        title=challenge.title,
-        description=challenge.description,
-        category=challenge.category,
-        difficulty=challenge.difficulty,
-        expected_output=challenge.expected_output,
-        active_date=challenge.active_date,
-        is_active=challenge.is_active,
-        created_at=challenge.created_at,
-        points=challenge.get_points(),
-        user_submitted=user_submitted
+    etag = today_etag(challenge, user_submitted)
+    
+    # Pre-serialized body, compressed once per variant; response_model
+    # still documents the schema
+    return cached_json_response(
+        challenge_json(challenge, user_submitted),
+        etag,
+        if_none_match,
+        PRIVATE_REVALIDATE,
+        accept_encoding=accept_encoding or ""
     )
 
 
@@ -61,47 +79,59 @@ async def get_todays_challenge(
 async def get_challenges_history(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=50),
-    current_user: User = Depends(get_current_user),
+    cursor: str | None = Query(None),
+    if_none_match: str | None = Header(None),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Get past challenges history.
     
     Returns paginated list of past challenges with submission status.
-    """
-    challenges, total = await get_challenge_history(db, current_user.id, page, page_size)
     
-    challenge_responses = []
-    for challenge in challenges:
-        user_submitted = await check_user_submitted(db, current_user.id, challenge.id)
-        challenge_responses.append(
-            ChallengeResponse(
-                id=challenge.id,
-                title=challenge.title,
-                description=challenge.description,
-                category=challenge.category,
-                difficulty=challenge.difficulty,
-                expected_output=challenge.expected_output,
-                active_date=challenge.active_date,
-                is_active=challenge.is_active,
-                created_at=challenge.created_at,
-                points=challenge.get_points(),
-                user_submitted=user_submitted
+    - **page** / **page_size**: Offset pagination
+    - **cursor**: Continue from a previous response's `next_cursor` (overrides page)
+    
+    Supports If-None-Match; a matching ETag is answered from the cached
+    total and the user's completion bitmap without querying the page.
+    """
+    before = None
+    if cursor is not None:
+        try:
+            before = decode_history_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
             )
-        )
     
-    return ChallengeHistory(
-        challenges=challenge_responses,
-        total=total,
-        page=page,
-        page_size=page_size
+    # The page is determined by the day, position, total and the user's bits
+    today = local_today(current_user.timezone)
+    total = await count_past_challenges(db, today)
+    etag = make_etag(
+        "history", today, page, page_size, cursor, total, current_user.completion_bitmap
     )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, PRIVATE_REVALIDATE)
+    
+    challenges, total, next_before = await get_challenge_history(
+        db, current_user.completion_bitmap, today, page, page_size, before
+    )
+    
+    body = history_json(
+        challenges,
+        total,
+        page,
+        page_size,
+        encode_history_cursor(next_before) if next_before else None
+    )
+    return cached_json_response(body, etag, None, PRIVATE_REVALIDATE)
 
 
 @router.post("/submit", response_model=SubmissionResponse, status_code=status.HTTP_201_CREATED)
 async def submit_challenge(
     submission_data: SubmissionCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -111,8 +141,11 @@ async def submit_challenge(
     - Late submissions are rejected
     - Streak and points are calculated server-side
     """
-    # Get the challenge
-    challenge = await get_challenge_by_id(db, submission_data.challenge_id)
+    # Get the challenge, usually straight from the today cache
+    today = local_today(current_user.timezone)
+    challenge = await get_today_challenge_snapshot(db, today)
+    if challenge is None or challenge.id != submission_data.challenge_id:
+        challenge = await get_challenge_by_id(db, submission_data.challenge_id)
     
     if not challenge:
         raise HTTPException(
@@ -121,11 +154,17 @@ async def submit_challenge(
         )
     
     try:
+        if settings.SUBMISSION_WRITE_BEHIND:
+            # Acknowledge from memory; the queue writes it in a later batch
+            pending = submission_queue.submit(current_user, challenge, submission_data)
+            return SubmissionResponse.model_validate(pending)
+        
         submission = await create_submission(
             db=db,
-            user=current_user,
+            user_id=current_user.id,
             challenge=challenge,
-            submission_data=submission_data
+            submission_data=submission_data,
+            today=today
         )
         return submission
     except ValueError as e:
@@ -133,3 +172,9 @@ async def submit_challenge(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except SubmissionQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many submissions right now, please retry shortly",
+            headers={"Retry-After": str(settings.SUBMISSION_RETRY_AFTER_SECONDS)},
+        )
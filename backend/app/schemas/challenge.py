@@ -41,3 +41,4 @@ class ChallengeHistory(BaseModel):
     total: int
     page: int
     page_size: int
+    next_cursor: str | None = None
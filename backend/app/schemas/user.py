@@ -2,8 +2,16 @@
 User Pydantic schemas for request/response validation.
 """
 from datetime import datetime, date
+from functools import lru_cache
 from uuid import UUID
-from pydantic import BaseModel, EmailStr, Field
+from zoneinfo import available_timezones
+from pydantic import BaseModel, EmailStr, Field, field_validator
+
+
+@lru_cache(maxsize=1)
+def _timezone_names() -> frozenset[str]:
+    """IANA timezone names known to the system zone database or tzdata."""
+    return frozenset(available_timezones())
 
 
 class UserCreate(BaseModel):
@@ -11,6 +19,15 @@ class UserCreate(BaseModel):
     username: str = Field(..., min_length=3, max_length=50, pattern=r"^[a-zA-Z0-9_]+$")
     email: EmailStr
     password: str = Field(..., min_length=6, max_length=100)
+    timezone: str = Field("UTC", max_length=64)
+    
+    @field_validator("timezone")
+    @classmethod
+    def validate_timezone(cls, value: str) -> str:
+        """Accept IANA timezone names such as "America/New_York"."""
+        if value not in _timezone_names():
+            raise ValueError("Unknown timezone")
+        return value
 
 
 class UserLogin(BaseModel):
@@ -34,6 +51,7 @@ class UserResponse(BaseModel):
     longest_streak: int
     total_points: int
     last_completed_date: date | None
+    timezone: str
     created_at: datetime
     
     class Config:
@@ -49,6 +67,7 @@ class UserProfile(BaseModel):
     longest_streak: int
     total_points: int
     last_completed_date: date | None
+    timezone: str
     created_at: datetime
     rank: int | None = None
     total_submissions: int = 0
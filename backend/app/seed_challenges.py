@@ -3,9 +3,12 @@ Seed script to populate database with sample challenges.
 Run with: python -m app.seed_challenges
 """
 import asyncio
-from datetime import date, timedelta
+from datetime import timedelta
 from app.database import AsyncSessionLocal, create_tables
 from app.models.challenge import Challenge, ChallengeCategory, ChallengeDifficulty
+from app.schemas.challenge import ChallengeCreate
+from app.services.challenge_import import commit_import, insert_challenges
+from app.services.local_day import local_today
 
 
 # Sample challenges for 14 days
@@ -273,26 +276,18 @@ async def seed_challenges():
             print("Challenges already seeded. Skipping...")
             return
         
-        # Seed challenges starting from today
-        today = date.today()
+        # Seed challenges starting from today in UTC (only today's is active)
+        today = local_today("UTC")
         
-        for i, challenge_data in enumerate(SAMPLE_CHALLENGES):
-            active_date = today + timedelta(days=i)
-            
-            challenge = Challenge(
-                title=challenge_data["title"],
-                description=challenge_data["description"],
-                category=challenge_data["category"],
-                difficulty=challenge_data["difficulty"],
-                expected_output=challenge_data.get("expected_output"),
-                active_date=active_date,
-                is_active=(i == 0)  # Only first challenge is active
-            )
-            
-            db.add(challenge)
-            print(f"Added challenge: {challenge.title} (Active: {active_date})")
+        challenges = [
+            ChallengeCreate(**challenge_data, active_date=today + timedelta(days=i))
+            for i, challenge_data in enumerate(SAMPLE_CHALLENGES)
+        ]
+        await insert_challenges(db, challenges)
+        for challenge in challenges:
+            print(f"Added challenge: {challenge.title} (Active: {challenge.active_date})")
         
-        await db.commit()
+        await commit_import(db, len(challenges))
         print(f"\n✓ Seeded {len(SAMPLE_CHALLENGES)} challenges successfully!")
 
 
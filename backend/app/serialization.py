@@ -0,0 +1,104 @@
+"""
+JSON serialization for API responses.
+
+With FAST_JSON enabled and the optional `orjson` package installed,
+responses are encoded with orjson, which handles UUID, date/datetime and
+enum values natively. Otherwise the standard library encoder is used.
+"""
+import json
+import logging
+from typing import Any, Optional
+from uuid import UUID
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+FAST_JSON_ENABLED = settings.FAST_JSON and orjson is not None
+if settings.FAST_JSON and orjson is None:
+    logger.warning("FAST_JSON is set but orjson is not installed; using the standard encoder")
+
+
+def _orjson_default(obj: Any) -> Any:
+    """Encode values orjson does not handle natively."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    # asyncpg returns its own UUID subclass, which orjson does not accept
+    if isinstance(obj, UUID):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode content to JSON bytes.
+    
+    Accepts dicts, lists, Pydantic models and the scalar types the API
+    uses (UUID, date, datetime, enums).
+    
+    Args:
+        content: Value to encode
+    
+    Returns:
+        Compact UTF-8 JSON
+    """
+    if FAST_JSON_ENABLED:
+        return orjson.dumps(content, default=_orjson_default)
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the configured encoder."""
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def default_response_class() -> type[JSONResponse]:
+    """Response class for the application (FastJSONResponse when FAST_JSON is on)."""
+    return FastJSONResponse if FAST_JSON_ENABLED else JSONResponse
+
+
+def json_response(
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[dict[str, str]] = None
+) -> Response:
+    """
+    Return pre-built content as a JSON response.
+    
+    The content is encoded as-is, skipping response_model validation, so
+    handlers that already hold correct data (or encoded bytes) do not pay
+    for it twice. The route's response_model still documents the schema.
+    
+    Args:
+        content: Dict, list, model, or already-encoded JSON bytes
+        status_code: HTTP status code
+        headers: Extra response headers
+    
+    Returns:
+        JSON response
+    """
+    body = content if isinstance(content, bytes) else dumps(content)
+    return Response(
+        content=body,
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json"
+    )
@@ -1,7 +1,10 @@
 """
 Authentication service for JWT token management and password hashing.
 """
-from datetime import datetime, timedelta
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
 from typing import Optional
 from uuid import UUID
 
@@ -15,14 +18,106 @@ from sqlalchemy import select
 from app.config import settings
 from app.database import get_db
 from app.models.user import User
+from app.services.cache import TTLCache
 
 
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Authenticated user fields that handlers need, detached from any session."""
+    id: UUID
+    username: str
+    email: str
+    current_streak: int
+    longest_streak: int
+    total_points: int
+    total_submissions: int
+    last_completed_date: Optional[date]
+    created_at: datetime
+    completion_bitmap: bytes
+    timezone: str
+
+
+# User columns selected to build a Principal, in field order
+PRINCIPAL_COLUMNS = (
+    User.id,
+    User.username,
+    User.email,
+    User.current_streak,
+    User.longest_streak,
+    User.total_points,
+    User.total_submissions,
+    User.last_completed_date,
+    User.created_at,
+    User.completion_bitmap,
+    User.timezone,
+)
+
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # HTTP Bearer security scheme
 security = HTTPBearer()
 
+class PrincipalCache:
+    """
+    Cache of principals keyed by user ID, with per-user versions.
+    
+    Every invalidation gives the user a new version (clearing gives every
+    user one). A reader records `version(user_id)` before querying and
+    passes it to `store`, which refuses to publish a row that raced with
+    an invalidation, e.g. one read just before a submit committed.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Latest invalidation per user; an entry filled from an older
+        # read would expire within `ttl` anyway
+        self._versions = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._counter = 0
+        self._cleared_at = 0
+    
+    def get(self, user_id: UUID) -> Optional[Principal]:
+        """Return the cached principal, if still valid."""
+        return self._entries.get(user_id)
+    
+    def version(self, user_id: UUID) -> int:
+        """Current version of a user's entry."""
+        return max(self._versions.get(user_id, 0), self._cleared_at)
+    
+    def store(self, user_id: UUID, principal: Principal, version: int) -> bool:
+        """Cache a principal unless the user was invalidated since `version`."""
+        if version != self.version(user_id):
+            return False
+        self._entries.set(user_id, principal)
+        return True
+    
+    def invalidate(self, user_id: UUID) -> None:
+        """Drop a user's entry and reject in-flight fills for them."""
+        self._counter += 1
+        self._versions.set(user_id, self._counter)
+        self._entries.pop(user_id)
+    
+    def clear(self) -> None:
+        """Drop every entry and reject every in-flight fill."""
+        self._counter += 1
+        self._cleared_at = self._counter
+        self._entries.clear()
+        self._versions.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Recently authenticated principals
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+# Worker pool for bcrypt, created on first use
+_hash_executor: Optional[Executor] = None
+_hash_pending = 0
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password."""
@@ -34,6 +129,61 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _get_hash_executor() -> Executor:
+    """Get the bcrypt worker pool, creating it if needed."""
+    global _hash_executor
+    if _hash_executor is None:
+        if settings.PASSWORD_HASH_USE_PROCESSES:
+            _hash_executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        else:
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="bcrypt"
+            )
+    return _hash_executor
+
+
+async def _run_hashing(func, *args):
+    """
+    Run a bcrypt call on the worker pool instead of the event loop.
+    
+    Raises:
+        HTTPException: 503 with Retry-After when too many calls are queued
+    """
+    global _hash_pending
+    if _hash_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+        )
+    
+    _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_executor(), func, *args)
+    finally:
+        _hash_pending -= 1
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing pool."""
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing pool."""
+    return await _run_hashing(get_password_hash, password)
+
+
+def shutdown_hashing_pool() -> None:
+    """Stop the hashing pool workers."""
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token.
@@ -84,54 +234,80 @@ def decode_token(token: str) -> Optional[dict]:
         return None
 
 
-async def get_current_user(
+def _credentials_exception() -> HTTPException:
+    """Build the 401 raised for any invalid or unknown token."""
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _user_id_from_credentials(credentials: HTTPAuthorizationCredentials) -> UUID:
+    """
+    Extract the user ID from a bearer token.
+    
+    Raises:
+        HTTPException: If the token is invalid
+    """
+    payload = decode_token(credentials.credentials)
+    
+    if payload is None:
+        raise _credentials_exception()
+    
+    user_id: str = payload.get("sub")
+    if user_id is None:
+        raise _credentials_exception()
+    
+    try:
+        return UUID(user_id)
+    except ValueError:
+        raise _credentials_exception()
+
+
+async def get_current_principal(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
-) -> User:
+) -> Principal:
     """
-    Dependency to get the current authenticated user.
+    Dependency to get the current user as a cached principal.
+    
+    Served from the principal cache when possible; on a miss only the
+    principal's columns are selected, without building an ORM object.
     
     Args:
         credentials: HTTP Bearer credentials
         db: Database session
     
     Returns:
-        Current authenticated user
+        Current authenticated principal
     
     Raises:
         HTTPException: If token is invalid or user not found
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    token = credentials.credentials
-    payload = decode_token(token)
-    
-    if payload is None:
-        raise credentials_exception
-    
-    user_id: str = payload.get("sub")
-    if user_id is None:
-        raise credentials_exception
+    user_uuid = _user_id_from_credentials(credentials)
     
-    try:
-        user_uuid = UUID(user_id)
-    except ValueError:
-        raise credentials_exception
+    principal = principal_cache.get(user_uuid)
+    if principal is not None:
+        return principal
     
-    # Fetch user from database
+    version = principal_cache.version(user_uuid)
     result = await db.execute(
-        select(User).where(User.id == user_uuid)
+        select(*PRINCIPAL_COLUMNS).where(User.id == user_uuid)
     )
-    user = result.scalar_one_or_none()
+    row = result.one_or_none()
     
-    if user is None:
-        raise credentials_exception
+    if row is None:
+        raise _credentials_exception()
     
-    return user
+    principal = Principal(*row)
+    principal_cache.store(user_uuid, principal, version)
+    return principal
+
+
+def invalidate_principal(user_id: UUID) -> None:
+    """Drop a cached principal after the user's stats change."""
+    principal_cache.invalidate(user_id)
 
 
 async def authenticate_user(
@@ -158,7 +334,7 @@ async def authenticate_user(
     if user is None:
         return None
     
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
     
     return user
@@ -0,0 +1,60 @@
+"""
+Small in-process caching primitives.
+"""
+import time
+from collections import OrderedDict
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache with per-entry expiry.
+    
+    Entries expire after `ttl` seconds (or the per-call override). When the
+    cache is full the least recently used entry is evicted. Not thread-safe;
+    intended for use from the event loop only.
+    """
+    
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live entry or `default`, refreshing its LRU position."""
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value; `ttl` overrides the cache default for this entry."""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else float("inf")
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+    
+    def pop(self, key: Hashable) -> None:
+        """Drop an entry if present."""
+        self._data.pop(key, None)
+    
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def seconds_until_day_end(day: date) -> float:
+    """Seconds from now until the UTC midnight that ends `day`."""
+    boundary = datetime.combine(day + timedelta(days=1), dt_time.min, tzinfo=timezone.utc)
+    return max((boundary - datetime.now(timezone.utc)).total_seconds(), 0.0)
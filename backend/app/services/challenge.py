@@ -1,45 +1,97 @@
 """
 Challenge service for managing daily challenges.
 """
+import base64
+import binascii
+import dataclasses
+import logging
+import time
 from datetime import date, datetime
-from typing import Optional
+from typing import Optional, Sequence
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, update, and_, or_, func
+from sqlalchemy.sql.base import ExecutableOption
 
+from app.database import after_commit
 from app.models.challenge import Challenge
-from app.models.submission import Submission
 from app.schemas.challenge import ChallengeCreate
+from app.services.challenge_payload import prewarm_today_payloads
+from app.services.completion import is_completed
+from app.services.events import EventType, publish
+from app.services.local_day import local_today, seconds_until_last_day_end
+from app.services.challenge_cache import (
+    ChallengeSnapshot,
+    today_challenge_cache,
+    history_total_cache,
+)
 
+# Configure logging
+logger = logging.getLogger(__name__)
 
-async def get_today_challenge(db: AsyncSession) -> Optional[Challenge]:
+
+async def get_today_challenge(
+    db: AsyncSession,
+    today: date,
+    options: Sequence[ExecutableOption] = ()
+) -> Optional[Challenge]:
     """
-    Get today's active challenge.
+    Get the challenge for a user's current day.
+    
+    The is_active flag follows the UTC rotation, so users in other
+    timezones are matched on active_date alone.
     
     Args:
         db: Database session
+        today: The user's local date (see app.services.local_day)
+        options: Loader options, e.g. selectinload(Challenge.submissions)
     
     Returns:
-        Today's challenge or None if not found
+        The day's challenge or None if not found
     """
-    today = date.today()
-    
     result = await db.execute(
-        select(Challenge).where(
-            and_(
-                Challenge.active_date == today,
-                Challenge.is_active == True
-            )
-        )
+        select(Challenge)
+        .where(Challenge.active_date == today)
+        .options(*options)
     )
     return result.scalar_one_or_none()
 
 
+async def get_today_challenge_snapshot(db: AsyncSession, today: date) -> Optional[ChallengeSnapshot]:
+    """
+    Get the challenge for a user's current day from the in-process cache.
+    
+    Falls back to the database on a miss and caches the result until the
+    TTL elapses, the day ends in every timezone, or the cache is
+    invalidated. The snapshot is marked active: it is the current
+    challenge for everyone whose local date is `today`.
+    
+    Args:
+        db: Database session
+        today: The user's local date (see app.services.local_day)
+    
+    Returns:
+        Snapshot of the day's challenge or None if not found
+    """
+    snapshot = today_challenge_cache.get(today)
+    if snapshot is not None:
+        return snapshot
+    
+    version = today_challenge_cache.version
+    challenge = await get_today_challenge(db, today)
+    if challenge is None:
+        return None
+    
+    snapshot = dataclasses.replace(ChallengeSnapshot.from_challenge(challenge), is_active=True)
+    today_challenge_cache.store(today, snapshot, version)
+    return snapshot
+
+
 async def get_challenge_by_id(
     db: AsyncSession,
-    challenge_id: UUID
+    challenge_id: UUID,
+    options: Sequence[ExecutableOption] = ()
 ) -> Optional[Challenge]:
     """
     Get a challenge by its ID.
@@ -47,54 +99,116 @@ async def get_challenge_by_id(
     Args:
         db: Database session
         challenge_id: Challenge UUID
+        options: Loader options, e.g. selectinload(Challenge.submissions)
     
     Returns:
         Challenge or None if not found
     """
     result = await db.execute(
-        select(Challenge).where(Challenge.id == challenge_id)
+        select(Challenge)
+        .where(Challenge.id == challenge_id)
+        .options(*options)
     )
     return result.scalar_one_or_none()
 
 
+def encode_history_cursor(active_date: date) -> str:
+    """Encode a history position as an opaque cursor string."""
+    return base64.urlsafe_b64encode(active_date.isoformat().encode()).decode().rstrip("=")
+
+
+def decode_history_cursor(cursor: str) -> date:
+    """
+    Decode a cursor produced by encode_history_cursor.
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return date.fromisoformat(base64.urlsafe_b64decode(padded).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid history cursor")
+
+
+async def count_past_challenges(db: AsyncSession, today: date) -> int:
+    """
+    Count challenges dated before a user's current day.
+    
+    Past challenges do not change during the day, so the count is cached
+    until the day ends in every timezone or a challenge is created.
+    
+    Args:
+        db: Database session
+        today: The user's local date
+    
+    Returns:
+        Number of past challenges
+    """
+    total = history_total_cache.get(today)
+    if total is not None:
+        return total
+    
+    result = await db.execute(
+        select(func.count()).select_from(Challenge).where(Challenge.active_date < today)
+    )
+    total = result.scalar_one()
+    history_total_cache.set(today, total, ttl=seconds_until_last_day_end(today))
+    return total
+
+
 async def get_challenge_history(
     db: AsyncSession,
-    user_id: UUID,
+    completion_bitmap: bytes,
+    today: date,
     page: int = 1,
-    page_size: int = 10
-) -> tuple[list[Challenge], int]:
+    page_size: int = 10,
+    before: Optional[date] = None
+) -> tuple[list[tuple[Challenge, bool]], int, Optional[date]]:
     """
     Get past challenges with user submission status.
     
+    The submission status is a bit test on the user's completion bitmap,
+    so the page is a single query on challenges. When `before` is given
+    the page is read with a keyset condition on active_date instead of
+    OFFSET, which costs the same at any depth.
+    
     Args:
         db: Database session
-        user_id: Current user's UUID
-        page: Page number
+        completion_bitmap: Current user's completion bitmap
+        today: The user's local date; earlier challenges are history
+        page: Page number (ignored when `before` is given)
         page_size: Number of items per page
+        before: Only return challenges dated before this day
     
     Returns:
-        Tuple of (challenges list, total count)
+        Tuple of ((challenge, user_submitted) list, total count,
+        active_date to continue from or None on the last page)
     """
-    today = date.today()
-    offset = (page - 1) * page_size
-    
-    # Get total count
-    count_result = await db.execute(
-        select(Challenge).where(Challenge.active_date < today)
-    )
-    total = len(count_result.scalars().all())
+    total = await count_past_challenges(db, today)
     
-    # Get paginated challenges
-    result = await db.execute(
+    # Get one extra row to know whether another page follows
+    query = (
         select(Challenge)
         .where(Challenge.active_date < today)
         .order_by(Challenge.active_date.desc())
-        .offset(offset)
-        .limit(page_size)
+        .limit(page_size + 1)
     )
-    challenges = result.scalars().all()
+    if before is not None:
+        query = query.where(Challenge.active_date < before)
+    else:
+        query = query.offset((page - 1) * page_size)
     
-    return list(challenges), total
+    result = await db.execute(query)
+    rows = list(result.scalars().all())
+    
+    challenges = [
+        (challenge, is_completed(completion_bitmap, challenge.active_date))
+        for challenge in rows[:page_size]
+    ]
+    next_before = challenges[-1][0].active_date if len(rows) > page_size else None
+    
+    return challenges, total, next_before
 
 
 async def create_challenge(
@@ -104,6 +218,8 @@ async def create_challenge(
     """
     Create a new challenge.
     
+    It starts active if its date is today in UTC, matching the rotation.
+    
     Args:
         db: Database session
         challenge_data: Challenge creation data
@@ -118,20 +234,41 @@ async def create_challenge(
         difficulty=challenge_data.difficulty,
         expected_output=challenge_data.expected_output,
         active_date=challenge_data.active_date,
-        is_active=challenge_data.active_date == date.today()
+        is_active=challenge_data.active_date == local_today("UTC")
     )
     
     db.add(challenge)
     await db.flush()
     await db.refresh(challenge)
     
+    await publish(
+        db,
+        EventType.CHALLENGE_CREATED,
+        challenge_id=challenge.id,
+        active_date=challenge.active_date,
+        is_active=challenge.is_active
+    )
+    
+    def invalidate_caches() -> None:
+        if challenge.is_active:
+            today_challenge_cache.invalidate()
+        history_total_cache.clear()
+    
+    after_commit(db, invalidate_caches)
+    
     return challenge
 
 
 async def activate_today_challenge(db: AsyncSession) -> Optional[Challenge]:
     """
-    Activate today's challenge and deactivate others.
-    Called by the scheduler at midnight UTC.
+    Activate today's (UTC) challenge and deactivate others.
+    Called by the scheduler at midnight UTC and at startup.
+    
+    Runs as a single UPDATE that only touches rows whose state changes
+    (the previously active challenge and today's), so it is idempotent
+    and its cost does not grow with the size of the challenge table.
+    When anything changed, other workers are notified with a
+    challenge.rotated event at commit.
     
     Args:
         db: Database session
@@ -139,51 +276,79 @@ async def activate_today_challenge(db: AsyncSession) -> Optional[Challenge]:
     Returns:
         Activated challenge or None
     """
-    today = date.today()
-    
-    # Deactivate all challenges
-    all_challenges_result = await db.execute(select(Challenge))
-    all_challenges = all_challenges_result.scalars().all()
+    started = time.perf_counter()
+    today = local_today("UTC")
     
-    for challenge in all_challenges:
-        challenge.is_active = False
+    result = await db.execute(
+        update(Challenge)
+        .where(
+            or_(
+                and_(Challenge.is_active == True, Challenge.active_date != today),
+                and_(Challenge.is_active == False, Challenge.active_date == today)
+            )
+        )
+        .values(is_active=Challenge.active_date == today)
+        .execution_options(synchronize_session=False)
+    )
+    changed = result.rowcount
     
-    # Activate today's challenge
     result = await db.execute(
         select(Challenge).where(Challenge.active_date == today)
     )
     today_challenge = result.scalar_one_or_none()
     
-    if today_challenge:
-        today_challenge.is_active = True
+    if changed:
+        await publish(db, EventType.CHALLENGE_ROTATED, day=today)
     
     await db.commit()
+    if changed:
+        # A snapshot staged by prewarm_challenge is already correct for today
+        today_challenge_cache.invalidate(keep=today)
+    
+    logger.info(
+        f"Challenge rotation for {today}: {changed} row(s) changed "
+        f"in {(time.perf_counter() - started) * 1000:.1f}ms"
+    )
     
     return today_challenge
 
 
-async def check_user_submitted(
-    db: AsyncSession,
-    user_id: UUID,
-    challenge_id: UUID
-) -> bool:
+
+async def prewarm_challenge(db: AsyncSession, day: date) -> Optional[ChallengeSnapshot]:
     """
-    Check if user has already submitted for a challenge.
+    Load, serialize and stage the challenge for an upcoming day.
+    
+    Run shortly before midnight so the first requests of `day` find the
+    snapshot, its JSON payloads (plain and compressed) and the history
+    total already in memory. Caches are keyed by day, so the switch at
+    midnight needs no further work.
     
     Args:
         db: Database session
-        user_id: User's UUID
-        challenge_id: Challenge's UUID
+        day: Day to prepare, usually tomorrow
     
     Returns:
-        True if user has submitted, False otherwise
+        Staged snapshot or None if no challenge is scheduled for `day`
     """
+    version = today_challenge_cache.version
+    
     result = await db.execute(
-        select(Submission).where(
-            and_(
-                Submission.user_id == user_id,
-                Submission.challenge_id == challenge_id
-            )
-        )
+        select(Challenge).where(Challenge.active_date == day)
+    )
+    challenge = result.scalar_one_or_none()
+    if challenge is None:
+        logger.warning(f"No challenge scheduled for {day}; nothing to prewarm")
+        return None
+    
+    # Stage it as it will look once the rotation has activated it
+    snapshot = dataclasses.replace(ChallengeSnapshot.from_challenge(challenge), is_active=True)
+    today_challenge_cache.stage(day, snapshot, version)
+    prewarm_today_payloads(snapshot)
+    
+    result = await db.execute(
+        select(func.count()).select_from(Challenge).where(Challenge.active_date < day)
     )
-    return result.scalar_one_or_none() is not None
+    history_total_cache.set(day, result.scalar_one(), ttl=seconds_until_last_day_end(day))
+    
+    logger.info(f"Prewarmed challenge for {day}: {snapshot.title}")
+    return snapshot
@@ -0,0 +1,107 @@
+"""
+In-process caches for challenge data.
+
+Each day's challenge is kept as an immutable snapshot keyed by its date;
+users resolve the key from their local day (see app.services.local_day).
+Entries expire after a short TTL and never outlive the day they belong
+to in the last timezone to leave it.
+"""
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from app.config import settings
+from app.models.challenge import Challenge, ChallengeCategory, ChallengeDifficulty
+from app.services.cache import TTLCache, seconds_until_day_end
+from app.services.local_day import seconds_until_last_day_end
+
+
+@dataclass(frozen=True, slots=True)
+class ChallengeSnapshot:
+    """Read-only copy of a challenge, detached from any session."""
+    id: uuid.UUID
+    title: str
+    description: str
+    category: ChallengeCategory
+    difficulty: ChallengeDifficulty
+    expected_output: Optional[str]
+    active_date: date
+    is_active: bool
+    created_at: datetime
+    points: int
+    
+    @classmethod
+    def from_challenge(cls, challenge: Challenge) -> "ChallengeSnapshot":
+        """Build a snapshot from a loaded challenge row."""
+        return cls(
+            id=challenge.id,
+            title=challenge.title,
+            description=challenge.description,
+            category=challenge.category,
+            difficulty=challenge.difficulty,
+            expected_output=challenge.expected_output,
+            active_date=challenge.active_date,
+            is_active=challenge.is_active,
+            created_at=challenge.created_at,
+            points=challenge.get_points(),
+        )
+
+
+class TodayChallengeCache:
+    """
+    Versioned cache of challenge snapshots keyed by active date.
+    
+    Every invalidation bumps `version`. A reader records the version before
+    querying and passes it to `store`, which refuses to publish a result
+    that raced with an invalidation.
+    """
+    
+    def __init__(self, ttl: float):
+        # Users' local days span yesterday to tomorrow in UTC terms
+        self._entries = TTLCache(maxsize=4, ttl=ttl)
+        self.version = 0
+    
+    def get(self, day: date) -> Optional[ChallengeSnapshot]:
+        """Return the cached snapshot for `day`, if still valid."""
+        return self._entries.get(day)
+    
+    def store(self, day: date, snapshot: ChallengeSnapshot, version: int) -> bool:
+        """Cache a snapshot unless the cache was invalidated since `version`."""
+        if version != self.version:
+            return False
+        ttl = min(self._entries.ttl, seconds_until_last_day_end(day))
+        self._entries.set(day, snapshot, ttl=ttl)
+        return True
+    
+    def stage(self, day: date, snapshot: ChallengeSnapshot, version: int) -> bool:
+        """
+        Cache a snapshot for an upcoming day ahead of time.
+        
+        The entry lives until the normal TTL has passed after the day
+        starts, so readers switch to it at midnight by key alone.
+        """
+        if version != self.version:
+            return False
+        ttl = seconds_until_day_end(day - timedelta(days=1)) + self._entries.ttl
+        self._entries.set(day, snapshot, ttl=ttl)
+        return True
+    
+    def invalidate(self, keep: Optional[date] = None) -> None:
+        """
+        Drop snapshots and reject in-flight fills.
+        
+        Args:
+            keep: Day whose snapshot is still valid and should survive
+        """
+        self.version += 1
+        kept = self._entries.get(keep) if keep is not None else None
+        self._entries.clear()
+        if kept is not None:
+            self._entries.set(keep, kept, ttl=min(self._entries.ttl, seconds_until_last_day_end(keep)))
+
+
+today_challenge_cache = TodayChallengeCache(ttl=settings.TODAY_CHALLENGE_CACHE_TTL_SECONDS)
+
+# Count of past challenges, keyed by the local day it was computed for
+history_total_cache = TTLCache(maxsize=4)
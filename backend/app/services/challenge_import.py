@@ -0,0 +1,306 @@
+"""
+Bulk import of challenges from JSONL or CSV files.
+
+A file is streamed twice. The first pass validates every row with
+ChallengeCreate and collects its active_date, so invalid rows and date
+collisions (within the file or with existing challenges) are reported
+before anything is written. The second pass inserts the rows in
+fixed-size COPY batches inside one transaction, parsing the next batch
+while the current one is written. Memory holds two batches plus one
+date per row, whatever the file size.
+
+JSONL files hold one challenge object per line. CSV files need a header
+row with the ChallengeCreate field names; an empty expected_output is
+read as null.
+"""
+import asyncio
+import csv
+import io
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime
+from typing import BinaryIO, Iterator, Optional, Sequence
+
+from pydantic import ValidationError
+from sqlalchemy import Date, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.challenge import Challenge
+from app.schemas.challenge import ChallengeCreate
+from app.services.challenge_cache import today_challenge_cache, history_total_cache
+from app.services.events import EventType, publish
+from app.services.local_day import local_today
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("jsonl", "csv")
+
+challenges_table = Challenge.__table__
+
+# Columns written by COPY, in record order
+COPY_COLUMNS = (
+    "id",
+    "title",
+    "description",
+    "category",
+    "difficulty",
+    "expected_output",
+    "active_date",
+    "is_active",
+    "created_at",
+)
+
+
+@dataclass
+class ImportReport:
+    """Summary of an import run."""
+    dry_run: bool
+    rows_read: int = 0
+    rows_imported: int = 0
+    invalid_rows: int = 0
+    # Rows whose active_date repeats an earlier row or an existing challenge
+    collisions: int = 0
+    elapsed_seconds: float = 0.0
+    # A bounded sample of (line number or None, message)
+    errors: list[tuple[Optional[int], str]] = field(default_factory=list)
+    
+    @property
+    def ok(self) -> bool:
+        """Whether the file was accepted (no invalid rows or collisions)."""
+        return self.invalid_rows == 0 and self.collisions == 0
+    
+    @property
+    def rows_per_second(self) -> float:
+        """Rows read per second of the whole run."""
+        return self.rows_read / self.elapsed_seconds if self.elapsed_seconds else 0.0
+    
+    def to_dict(self) -> dict:
+        """JSON-serializable form, including the derived fields."""
+        return {**asdict(self), "ok": self.ok, "rows_per_second": round(self.rows_per_second, 1)}
+
+
+def detect_format(filename: Optional[str]) -> str:
+    """
+    Infer the import format from a file name.
+    
+    Raises:
+        ValueError: If the extension is not .jsonl, .ndjson or .csv
+    """
+    name = (filename or "").lower()
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if name.endswith(".csv"):
+        return "csv"
+    raise ValueError(f"Cannot tell the format of {filename!r}; use one of {', '.join(IMPORT_FORMATS)}")
+
+
+def _iter_rows(file: BinaryIO, fmt: str) -> Iterator[tuple[int, str | dict]]:
+    """Yield (line number, row) pairs: raw JSON text for JSONL, a dict for CSV."""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "jsonl":
+            for line_no, line in enumerate(text, start=1):
+                if line.strip():
+                    yield line_no, line
+        else:
+            reader = csv.DictReader(text)
+            for row in reader:
+                if row.get("expected_output") == "":
+                    row["expected_output"] = None
+                yield reader.line_num, row
+    finally:
+        # Leave the underlying file open for the next pass
+        text.detach()
+
+
+def _parse(row: str | dict) -> ChallengeCreate:
+    """Validate one row (JSON is parsed and validated in one step)."""
+    if isinstance(row, str):
+        return ChallengeCreate.model_validate_json(row)
+    return ChallengeCreate.model_validate(row)
+
+
+def _scan(file: BinaryIO, fmt: str, report: ImportReport, max_errors: int) -> set[int]:
+    """
+    First pass: validate rows and find dates repeated within the file.
+    
+    Returns:
+        Ordinals of every valid row's active_date
+    
+    Raises:
+        ValueError: If the file is not UTF-8 or not parseable as CSV
+    """
+    seen: set[int] = set()
+    try:
+        for line_no, row in _iter_rows(file, fmt):
+            report.rows_read += 1
+            try:
+                challenge = _parse(row)
+            except ValidationError as e:
+                report.invalid_rows += 1
+                message = "; ".join(
+                    f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+                    for error in e.errors()
+                )
+            else:
+                ordinal = challenge.active_date.toordinal()
+                if ordinal not in seen:
+                    seen.add(ordinal)
+                    continue
+                report.collisions += 1
+                message = f"active_date {challenge.active_date} is used by an earlier row"
+            if len(report.errors) < max_errors:
+                report.errors.append((line_no, message))
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ValueError(f"Unreadable file after row {report.rows_read}: {e}")
+    return seen
+
+
+def challenge_record(challenge: ChallengeCreate, today: date, now: datetime) -> tuple:
+    """
+    COPY record (see COPY_COLUMNS) for a validated challenge.
+    
+    COPY bypasses SQLAlchemy, so the values it would fill in are set
+    here: a new UUID and created_at as the column defaults do, is_active
+    as create_challenge does, and enums by name as the Enum column type
+    stores them.
+    """
+    return (
+        uuid.uuid4(),
+        challenge.title,
+        challenge.description,
+        challenge.category.name,
+        challenge.difficulty.name,
+        challenge.expected_output,
+        challenge.active_date,
+        challenge.active_date == today,
+        now,
+    )
+
+
+def _record_batches(file: BinaryIO, fmt: str, batch_size: int) -> Iterator[list[tuple]]:
+    """Second pass: yield COPY records in batches (the file is known to be valid)."""
+    today = local_today("UTC")
+    now = datetime.utcnow()
+    batch: list[tuple] = []
+    for _, row in _iter_rows(file, fmt):
+        batch.append(challenge_record(_parse(row), today, now))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def find_existing_dates(db: AsyncSession, ordinals: set[int]) -> list[date]:
+    """Return which of the given date ordinals already have a challenge."""
+    if not ordinals:
+        return []
+    result = await db.execute(
+        select(Challenge.active_date)
+        .where(Challenge.active_date == any_(bindparam("dates", type_=ARRAY(Date))))
+        .order_by(Challenge.active_date),
+        {"dates": [date.fromordinal(ordinal) for ordinal in sorted(ordinals)]}
+    )
+    return list(result.scalars().all())
+
+
+async def copy_challenge_records(db: AsyncSession, records: list[tuple]) -> None:
+    """Write challenge records with COPY, in the session's transaction."""
+    connection = await db.connection()
+    driver = (await connection.get_raw_connection()).driver_connection
+    if not driver.is_in_transaction():
+        # The session begins its transaction on the first statement
+        await connection.exec_driver_sql("SELECT 1")
+    await driver.copy_records_to_table(challenges_table.name, columns=COPY_COLUMNS, records=records)
+
+
+async def insert_challenges(db: AsyncSession, challenges: Sequence[ChallengeCreate]) -> None:
+    """Insert validated challenges with a single COPY (uncommitted; see commit_import)."""
+    today = local_today("UTC")
+    now = datetime.utcnow()
+    await copy_challenge_records(db, [challenge_record(challenge, today, now) for challenge in challenges])
+
+
+async def commit_import(db: AsyncSession, count: int) -> None:
+    """Commit imported challenges and drop the caches they affect, here and in other workers."""
+    await publish(db, EventType.CHALLENGES_IMPORTED, count=count)
+    await db.commit()
+    today_challenge_cache.invalidate()
+    history_total_cache.clear()
+
+
+async def import_challenges(
+    db: AsyncSession,
+    file: BinaryIO,
+    fmt: str,
+    batch_size: int = settings.CHALLENGE_IMPORT_BATCH_SIZE,
+    dry_run: bool = False,
+    max_errors: int = 20
+) -> ImportReport:
+    """
+    Validate and import a challenge file.
+    
+    Nothing is written unless every row is valid and no active_date
+    collides; the inserts then commit together. File reading and
+    validation run in a worker thread so the event loop stays
+    responsive during large imports.
+    
+    Args:
+        db: Database session
+        file: Seekable binary file (e.g. UploadFile.file)
+        fmt: "jsonl" or "csv"
+        batch_size: Rows per COPY batch
+        dry_run: Only validate and check collisions
+        max_errors: Errors kept in the report
+    
+    Returns:
+        Import report; check `ok` before relying on rows_imported
+    
+    Raises:
+        ValueError: If the format is not supported or the file is unreadable
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format {fmt!r}; use one of {', '.join(IMPORT_FORMATS)}")
+    
+    started = time.perf_counter()
+    report = ImportReport(dry_run=dry_run)
+    
+    ordinals = await asyncio.to_thread(_scan, file, fmt, report, max_errors)
+    
+    existing = await find_existing_dates(db, ordinals)
+    report.collisions += len(existing)
+    for day in existing:
+        if len(report.errors) >= max_errors:
+            break
+        report.errors.append((None, f"active_date {day} already has a challenge"))
+    # The date set is not needed for the write pass
+    del ordinals
+    
+    if report.ok and not dry_run and report.rows_read:
+        file.seek(0)
+        batches = _record_batches(file, fmt, batch_size)
+        next_batch = asyncio.ensure_future(asyncio.to_thread(next, batches, None))
+        try:
+            while (records := await next_batch) is not None:
+                # Parse the following batch while this one is copied
+                next_batch = asyncio.ensure_future(asyncio.to_thread(next, batches, None))
+                await copy_challenge_records(db, records)
+                report.rows_imported += len(records)
+        finally:
+            next_batch.cancel()
+        await commit_import(db, report.rows_imported)
+    
+    report.elapsed_seconds = time.perf_counter() - started
+    logger.info(
+        f"Challenge import ({fmt}{', dry run' if dry_run else ''}): "
+        f"{report.rows_read} read, {report.rows_imported} imported, "
+        f"{report.invalid_rows} invalid, {report.collisions} collisions "
+        f"in {report.elapsed_seconds:.2f}s ({report.rows_per_second:.0f} rows/s)"
+    )
+    return report
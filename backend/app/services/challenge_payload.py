@@ -0,0 +1,121 @@
+"""
+Pre-serialized JSON payloads for challenge responses.
+
+A ChallengeResponse is the same for every user except `user_submitted`,
+so the rest of the object is serialized once per challenge and cached as
+bytes. Handlers splice the per-user flag onto the cached prefix and
+return the result directly, skipping model construction and response
+validation on the hot path.
+"""
+from typing import Optional
+
+from app.config import settings
+from app.models.challenge import Challenge
+from app.schemas.challenge import ChallengeResponse
+from app.serialization import dumps
+from app.services.cache import TTLCache
+from app.services.challenge_cache import ChallengeSnapshot
+from app.services.compression import SUPPORTED_ENCODINGS, precompressed
+from app.services.http_cache import make_etag, encoded_etag
+
+# Serialized ChallengeResponse without the closing brace or user_submitted,
+# keyed by (challenge id, is_active) so the daily rotation misses the cache
+payload_cache = TTLCache(maxsize=settings.CHALLENGE_PAYLOAD_CACHE_SIZE)
+
+_SUBMITTED_SUFFIX = {
+    True: b',"user_submitted":true}',
+    False: b',"user_submitted":false}',
+}
+
+
+def _static_payload(challenge: Challenge | ChallengeSnapshot) -> bytes:
+    """Get the cached per-challenge part of the response, building it on a miss."""
+    key = (challenge.id, challenge.is_active)
+    prefix = payload_cache.get(key)
+    if prefix is not None:
+        return prefix
+    
+    if isinstance(challenge, Challenge):
+        challenge = ChallengeSnapshot.from_challenge(challenge)
+    
+    body = ChallengeResponse(
+        id=challenge.id,
+        title=challenge.title,
+        description=challenge.description,
+        category=challenge.category,
+        difficulty=challenge.difficulty,
+        expected_output=challenge.expected_output,
+        active_date=challenge.active_date,
+        is_active=challenge.is_active,
+        created_at=challenge.created_at,
+        points=challenge.points
+    ).model_dump_json(exclude={"user_submitted"}).encode()
+    
+    # Drop the closing brace so the per-user flag can be appended
+    prefix = body[:-1]
+    payload_cache.set(key, prefix)
+    return prefix
+
+
+def challenge_json(challenge: Challenge | ChallengeSnapshot, user_submitted: bool) -> bytes:
+    """
+    Serialize a ChallengeResponse for one user.
+    
+    Args:
+        challenge: Challenge row or snapshot
+        user_submitted: Whether the current user completed it
+    
+    Returns:
+        JSON bytes identical to ChallengeResponse.model_dump_json()
+    """
+    return _static_payload(challenge) + _SUBMITTED_SUFFIX[bool(user_submitted)]
+
+
+def today_etag(challenge: Challenge | ChallengeSnapshot, user_submitted: bool) -> str:
+    """ETag of the /challenge/today body for one submission state."""
+    return make_etag("today", challenge.id, challenge.is_active, bool(user_submitted))
+
+
+def prewarm_today_payloads(challenge: ChallengeSnapshot) -> None:
+    """
+    Serialize and precompress every /challenge/today variant ahead of time.
+    
+    Fills the same caches the endpoint reads, for both submission states
+    and every supported encoding.
+    """
+    for user_submitted in (False, True):
+        body = challenge_json(challenge, user_submitted)
+        if len(body) < settings.COMPRESSION_MINIMUM_SIZE:
+            continue
+        etag = today_etag(challenge, user_submitted)
+        for encoding in SUPPORTED_ENCODINGS:
+            precompressed(body, encoded_etag(etag, encoding), encoding)
+
+
+def history_json(
+    challenges: list[tuple[Challenge, bool]],
+    total: int,
+    page: int,
+    page_size: int,
+    next_cursor: Optional[str]
+) -> bytes:
+    """
+    Serialize a ChallengeHistory page from cached challenge payloads.
+    
+    Args:
+        challenges: (challenge, user_submitted) pairs for the page
+        total: Total number of past challenges
+        page: Page number
+        page_size: Page size
+        next_cursor: Cursor for the next page, if any
+    
+    Returns:
+        JSON bytes matching the ChallengeHistory schema
+    """
+    items = b",".join(
+        challenge_json(challenge, submitted) for challenge, submitted in challenges
+    )
+    tail = dumps(
+        {"total": total, "page": page, "page_size": page_size, "next_cursor": next_cursor}
+    )
+    return b'{"challenges":[' + items + b"]," + tail[1:]
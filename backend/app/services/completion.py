@@ -0,0 +1,57 @@
+"""
+Per-user daily completion bitmaps.
+
+Each user row carries a bytea bitmap with one bit per day since
+COMPLETION_EPOCH, set when the user completes that day's challenge.
+Challenges are one per day, so "did the user complete challenge X" is a
+bit test on X's active_date instead of a submissions lookup.
+
+Bits are numbered like Postgres get_bit/set_bit: bit n lives in byte
+n // 8 at position n % 8, least significant bit first, so the same
+bitmap can be read here and updated in SQL.
+"""
+from datetime import date
+
+from sqlalchemy import LargeBinary, case, func
+
+# Day of bit 0
+COMPLETION_EPOCH = date(2020, 1, 1)
+
+
+def day_index(day: date) -> int:
+    """Bit index of `day` in a completion bitmap."""
+    return (day - COMPLETION_EPOCH).days
+
+
+def is_completed(bitmap: bytes, day: date) -> bool:
+    """
+    Check whether `day` is marked as completed.
+    
+    Args:
+        bitmap: User's completion bitmap
+        day: Day to test
+    
+    Returns:
+        True if the user completed that day's challenge
+    """
+    index = day_index(day)
+    if index < 0 or index >> 3 >= len(bitmap):
+        return False
+    return bool(bitmap[index >> 3] >> (index & 7) & 1)
+
+
+def bitmap_with_day(column, day: date):
+    """
+    SQL expression setting `day`'s bit in a bytea bitmap column.
+    
+    The bitmap is zero-padded first when it is too short to hold the bit.
+    """
+    index = day_index(day)
+    length = index // 8 + 1
+    padded = case(
+        (func.length(column) >= length, column),
+        else_=column.op("||", return_type=LargeBinary)(
+            func.decode(func.repeat("00", length - func.length(column)), "hex")
+        )
+    )
+    return func.set_bit(padded, index, 1, type_=LargeBinary)
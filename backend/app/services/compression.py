@@ -0,0 +1,77 @@
+"""
+Content-encoding negotiation and compression helpers.
+
+gzip is always available; brotli is used when the optional `brotli`
+package is installed. Bodies that are identical across requests can be
+compressed once and reused through `precompressed`.
+"""
+import gzip
+from typing import Optional
+
+from app.config import settings
+from app.services.cache import TTLCache
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Encodings we can produce, in order of preference
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Compressed bodies keyed by (ETag, encoding)
+precompressed_cache = TTLCache(maxsize=settings.PRECOMPRESSED_CACHE_SIZE)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the best supported encoding from an Accept-Encoding header.
+    
+    Args:
+        accept_encoding: Raw Accept-Encoding header value
+    
+    Returns:
+        "br", "gzip", or None when the client accepts neither
+    """
+    if not accept_encoding:
+        return None
+    
+    accepted: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    
+    wildcard = accepted.get("*", 0.0)
+    for encoding in SUPPORTED_ENCODINGS:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a whole body with the given encoding."""
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def precompressed(body: bytes, etag: str, encoding: str) -> bytes:
+    """
+    Compress a body once per (ETag, encoding) and reuse the result.
+    
+    Only use for bodies that are shared by many requests; the ETag must
+    identify the body exactly.
+    """
+    key = (etag, encoding)
+    compressed = precompressed_cache.get(key)
+    if compressed is None:
+        compressed = compress(body, encoding)
+        precompressed_cache.set(key, compressed)
+    return compressed
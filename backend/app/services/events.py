@@ -0,0 +1,201 @@
+"""
+Cross-worker event bus over Postgres LISTEN/NOTIFY.
+
+Services publish typed events inside their own transaction, so an event
+is delivered only if the change it describes commits. Every worker
+listens on one channel and runs the callbacks subscribed to each event
+type, typically to invalidate in-process caches. Events published by a
+worker are not delivered back to it; the publishing code path already
+updated its own caches.
+"""
+import asyncio
+import inspect
+import json
+import logging
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Awaitable, Callable, Optional, Union
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import DedicatedConnection, dedicated_connection
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = "app_events"
+
+# Identifies this process as the origin of the events it publishes
+INSTANCE_ID = uuid.uuid4().hex
+
+
+class EventType(str, Enum):
+    """Events published between workers."""
+    SUBMISSION_CREATED = "submission.created"
+    CHALLENGE_CREATED = "challenge.created"
+    CHALLENGES_IMPORTED = "challenges.imported"
+    CHALLENGE_ROTATED = "challenge.rotated"
+    CHALLENGE_PREWARM = "challenge.prewarm"
+    STATS_RECOMPUTED = "stats.recomputed"
+
+
+@dataclass(frozen=True, slots=True)
+class Event:
+    """A decoded event."""
+    type: EventType
+    origin: str
+    data: dict[str, Any] = field(default_factory=dict)
+    
+    def to_payload(self) -> str:
+        return json.dumps(
+            {"type": self.type.value, "origin": self.origin, "data": self.data},
+            default=str,
+            separators=(",", ":")
+        )
+    
+    @classmethod
+    def from_payload(cls, payload: str) -> "Event":
+        raw = json.loads(payload)
+        return cls(type=EventType(raw["type"]), origin=raw["origin"], data=raw.get("data", {}))
+
+
+Callback = Callable[[Event], Union[None, Awaitable[None]]]
+
+
+async def publish(db: AsyncSession, event_type: EventType, **data: Any) -> None:
+    """
+    Publish an event in the session's transaction.
+    
+    Postgres delivers it to listeners when the transaction commits and
+    drops it on rollback.
+    
+    Args:
+        db: Database session
+        event_type: Type of event
+        data: JSON-serializable event fields
+    """
+    await publish_many(db, event_type, [data])
+
+
+async def publish_many(db: AsyncSession, event_type: EventType, items: list[dict[str, Any]]) -> None:
+    """Publish one event per item with a single statement."""
+    if not items:
+        return
+    payloads = [Event(event_type, INSTANCE_ID, item).to_payload() for item in items]
+    await db.execute(
+        text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+        {"channel": EVENTS_CHANNEL, "payloads": payloads}
+    )
+
+
+class EventBus:
+    """
+    Listens for events and dispatches them to subscribers.
+    
+    Listens on the worker's dedicated connection, checked every
+    `health_interval` seconds and reopened when it fails. Events sent
+    while disconnected are lost, so reconnect callbacks run after every
+    reconnection to let subscribers resynchronize.
+    """
+    
+    def __init__(
+        self,
+        health_interval: float,
+        origin: str = INSTANCE_ID,
+        connection: DedicatedConnection = dedicated_connection
+    ):
+        self.health_interval = health_interval
+        self.origin = origin
+        self.connection = connection
+        self._subscribers: dict[EventType, list[Callback]] = defaultdict(list)
+        self._reconnect_callbacks: list[Callable[[], Union[None, Awaitable[None]]]] = []
+        # Connection generation the listener was added on (0: none yet)
+        self._generation = 0
+        self._task: Optional[asyncio.Task] = None
+        self._pending: set[asyncio.Task] = set()
+    
+    def subscribe(self, event_type: EventType, callback: Callback) -> None:
+        """Run `callback(event)` for every event of `event_type` from other workers."""
+        self._subscribers[event_type].append(callback)
+    
+    def on_reconnect(self, callback: Callable[[], Union[None, Awaitable[None]]]) -> None:
+        """Run `callback()` after the bus reconnects (events may have been missed)."""
+        self._reconnect_callbacks.append(callback)
+    
+    async def start(self) -> None:
+        """Connect now (if possible) and keep the connection alive in the background."""
+        await self._ensure_listening()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop listening; the connection itself is closed at shutdown."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.connection.fetchval("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Event bus connection lost: {e}")
+                await self.connection.close()
+            await self._ensure_listening()
+    
+    async def _ensure_listening(self) -> None:
+        """Listen on the current connection, opening one if needed."""
+        if self.connection.is_open and self._generation == self.connection.generation:
+            return
+        try:
+            generation = await self.connection.add_listener(EVENTS_CHANNEL, self._on_notify)
+        except Exception as e:
+            logger.error(f"Event bus could not connect: {e}")
+            await self.connection.close()
+            return
+        
+        if self._generation:
+            logger.info("Event bus reconnected; resynchronizing")
+            for callback in self._reconnect_callbacks:
+                self._invoke(callback)
+        self._generation = generation
+    
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            event = Event.from_payload(payload)
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed event")
+            return
+        if event.origin == self.origin:
+            return
+        for callback in self._subscribers.get(event.type, ()):
+            self._invoke(callback, event)
+    
+    def _invoke(self, callback, *args) -> None:
+        """Run a sync callback now, or schedule an async one."""
+        try:
+            result = callback(*args)
+            if inspect.isawaitable(result):
+                task = asyncio.ensure_future(result)
+                self._pending.add(task)
+                task.add_done_callback(self._callback_done)
+        except Exception as e:
+            logger.error(f"Event callback failed: {e}")
+    
+    def _callback_done(self, task: asyncio.Task) -> None:
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Event callback failed: {task.exception()}")
+
+
+event_bus = EventBus(health_interval=settings.EVENT_BUS_HEALTH_CHECK_SECONDS)
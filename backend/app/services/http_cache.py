@@ -0,0 +1,112 @@
+"""
+HTTP conditional request helpers (ETag / If-None-Match).
+
+ETags are derived from exactly the inputs a handler renders its body
+from, so a handler can answer 304 as soon as it knows those inputs,
+often before running any query.
+"""
+import hashlib
+from typing import Optional
+
+from fastapi import Response, status
+
+from app.config import settings
+from app.services.compression import negotiate_encoding, precompressed
+
+# Cache-Control for per-user responses: cacheable by the client only,
+# and always revalidated with the ETag
+PRIVATE_REVALIDATE = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """
+    Build a strong ETag from the values a response is rendered from.
+    
+    Args:
+        parts: Values identifying the response body (bytes are hashed as-is)
+    
+    Returns:
+        Quoted ETag header value
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b"\x1f")
+    return f'"{digest.hexdigest()}"'
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """ETag of the `encoding`-compressed representation of a body."""
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag.
+    
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """Build a 304 response carrying the validator headers."""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control}
+    )
+
+
+def cached_json_response(
+    body: bytes,
+    etag: str,
+    if_none_match: Optional[str],
+    cache_control: str,
+    accept_encoding: Optional[str] = None
+) -> Response:
+    """
+    Return `body` as JSON, or a 304 if the client already has it.
+    
+    Passing `accept_encoding` opts a body shared by many requests into
+    precompression: each (ETag, encoding) pair is compressed once and the
+    response is sent already encoded, with its own ETag.
+    
+    Args:
+        body: Serialized JSON body
+        etag: ETag for the body
+        if_none_match: Client's If-None-Match header
+        cache_control: Cache-Control header value
+        accept_encoding: Client's Accept-Encoding header, for shared bodies
+    
+    Returns:
+        200 response with the body, or 304 without it
+    """
+    headers = {"Cache-Control": cache_control}
+    
+    encoding = None
+    if accept_encoding is not None:
+        headers["Vary"] = "Accept-Encoding"
+        if len(body) >= settings.COMPRESSION_MINIMUM_SIZE:
+            encoding = negotiate_encoding(accept_encoding)
+    if encoding is not None:
+        etag = encoded_etag(etag, encoding)
+    headers["ETag"] = etag
+    
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    if encoding is not None:
+        body = precompressed(body, etag, encoding)
+        headers["Content-Encoding"] = encoding
+    
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,75 @@
+"""
+In-process cache invalidation driven by events from other workers.
+
+Each handler mirrors what the publishing worker already did to its own
+caches, so every worker converges on the same state.
+"""
+import logging
+from datetime import date
+from uuid import UUID
+
+from app.database import AsyncSessionLocal
+from app.services.auth import invalidate_principal, principal_cache
+from app.services.challenge import prewarm_challenge
+from app.services.challenge_cache import today_challenge_cache, history_total_cache
+from app.services.events import Event, EventBus, EventType
+from app.services.leaderboard import leaderboard_publisher
+from app.services.ranking import rank_index, load_rank_index
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def _on_submission_created(event: Event) -> None:
+    """A user's streak and points changed."""
+    invalidate_principal(UUID(event.data["user_id"]))
+    # Moving the rank index also marks the leaderboard snapshot stale
+    rank_index.move(event.data["old_points"], event.data["new_points"])
+
+
+def _on_challenge_created(event: Event) -> None:
+    """A challenge was added, possibly in the past or for today."""
+    history_total_cache.clear()
+    if event.data.get("is_active"):
+        today_challenge_cache.invalidate()
+
+
+def _on_challenges_imported(event: Event) -> None:
+    """Challenges were bulk imported, possibly including today's."""
+    history_total_cache.clear()
+    today_challenge_cache.invalidate()
+
+
+def _on_challenge_rotated(event: Event) -> None:
+    """The active challenge changed."""
+    # Keep a snapshot staged for the new day by the prewarm
+    today_challenge_cache.invalidate(keep=date.fromisoformat(event.data["day"]))
+    leaderboard_publisher.invalidate()
+
+
+async def _on_challenge_prewarm(event: Event) -> None:
+    """The scheduler owner asked every worker to stage the next challenge."""
+    async with AsyncSessionLocal() as db:
+        await prewarm_challenge(db, date.fromisoformat(event.data["day"]))
+
+
+async def resynchronize(event: Event | None = None) -> None:
+    """Drop every cache and rebuild the rank index (events may have been missed)."""
+    principal_cache.clear()
+    today_challenge_cache.invalidate()
+    history_total_cache.clear()
+    leaderboard_publisher.invalidate()
+    async with AsyncSessionLocal() as db:
+        await load_rank_index(db)
+    logger.info("In-process caches resynchronized")
+
+
+def register_invalidation_handlers(bus: EventBus) -> None:
+    """Subscribe the cache handlers to the event bus."""
+    bus.subscribe(EventType.SUBMISSION_CREATED, _on_submission_created)
+    bus.subscribe(EventType.CHALLENGE_CREATED, _on_challenge_created)
+    bus.subscribe(EventType.CHALLENGES_IMPORTED, _on_challenges_imported)
+    bus.subscribe(EventType.CHALLENGE_ROTATED, _on_challenge_rotated)
+    bus.subscribe(EventType.CHALLENGE_PREWARM, _on_challenge_prewarm)
+    bus.subscribe(EventType.STATS_RECOMPUTED, resynchronize)
+    bus.on_reconnect(resynchronize)
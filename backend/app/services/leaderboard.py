@@ -0,0 +1,219 @@
+"""
+Leaderboard service for ranking users by points and streaks.
+
+The public leaderboard is served from a published snapshot: the top
+LEADERBOARD_MAX_LIMIT rows encoded once as a JSON array, from which any
+smaller `limit` is a prefix slice.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.user import User
+from app.schemas.user import LeaderboardUser
+from app.services.local_day import local_days
+from app.services.ranking import rank_index
+from app.services.submission import effective_streak_now
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Largest `limit` the leaderboard endpoint accepts (and the snapshot holds)
+LEADERBOARD_MAX_LIMIT = 100
+
+
+def leaderboard_cache_control() -> str:
+    """Cache-Control for the public leaderboard, shareable by CDNs."""
+    return (
+        f"public, max-age={settings.LEADERBOARD_CACHE_MAX_AGE_SECONDS}, "
+        f"stale-while-revalidate={settings.LEADERBOARD_STALE_WHILE_REVALIDATE_SECONDS}"
+    )
+
+
+async def get_leaderboard_entries(db: AsyncSession, limit: int = 50) -> list[LeaderboardUser]:
+    """
+    Get the top users ranked by points, then current and longest streak.
+    
+    Streaks are effective streaks as of each user's local day, both in
+    the ordering and in the output, so ties on points rank by the streak
+    shown. That expression depends on now() and cannot be indexed, but
+    ix_users_leaderboard leads with total_points: Postgres walks it
+    backwards and incrementally sorts each run of equal points, stopping
+    after `limit` rows instead of sorting the users table. Only the
+    columns the leaderboard shows are selected.
+    
+    Args:
+        db: Database session
+        limit: Number of users to return
+    
+    Returns:
+        Ranked leaderboard entries
+    """
+    current_streak = effective_streak_now().label("current_streak")
+    result = await db.execute(
+        select(
+            User.id,
+            User.username,
+            User.total_points,
+            current_streak,
+            User.longest_streak
+        )
+        .order_by(
+            User.total_points.desc(),
+            current_streak.desc(),
+            User.longest_streak.desc()
+        )
+        .limit(limit)
+    )
+    
+    return [
+        LeaderboardUser(
+            rank=idx,
+            id=row.id,
+            username=row.username,
+            total_points=row.total_points,
+            current_streak=row.current_streak,
+            longest_streak=row.longest_streak
+        )
+        for idx, row in enumerate(result.all(), start=1)
+    ]
+
+
+@dataclass(frozen=True, slots=True)
+class LeaderboardSnapshot:
+    """Pre-encoded top-N leaderboard shared by every caller."""
+    version: int
+    # Local-day tick the effective streaks were evaluated in
+    tick: float
+    built_at: float
+    # JSON array of all rows, and the byte offset just past each row
+    blob: bytes
+    row_ends: tuple[int, ...]
+    # Content digest, stable across processes for the same rows
+    digest: str
+    
+    @classmethod
+    def build(cls, version: int, tick: float, entries: list[LeaderboardUser]) -> "LeaderboardSnapshot":
+        """Encode entries into a sliceable JSON array."""
+        parts = [b"["]
+        row_ends = []
+        offset = 1
+        for i, entry in enumerate(entries):
+            row = (b"," if i else b"") + entry.model_dump_json().encode()
+            parts.append(row)
+            offset += len(row)
+            row_ends.append(offset)
+        parts.append(b"]")
+        blob = b"".join(parts)
+        return cls(
+            version=version,
+            tick=tick,
+            built_at=time.monotonic(),
+            blob=blob,
+            row_ends=tuple(row_ends),
+            digest=hashlib.blake2b(blob, digest_size=16).hexdigest()
+        )
+    
+    def body(self, limit: int) -> bytes:
+        """JSON array of the top `limit` rows."""
+        if limit >= len(self.row_ends):
+            return self.blob
+        return self.blob[:self.row_ends[limit - 1]] + b"]"
+
+
+class LeaderboardPublisher:
+    """
+    Publishes leaderboard snapshots, rebuilding them on demand.
+    
+    A snapshot is rebuilt when it is older than `refresh_interval`, when
+    a local day changes in any timezone (the local-day tick ends), or
+    when points changed (the rank index moved) and it
+    is at least `min_interval` old. Concurrent readers share a single
+    in-flight rebuild, which runs in its own session so a cancelled
+    request cannot abort it.
+    """
+    
+    def __init__(self, size: int, refresh_interval: float, min_interval: float):
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self.min_interval = min_interval
+        self._snapshot: Optional[LeaderboardSnapshot] = None
+        self._rank_version = -1
+        self._stale = False
+        self._inflight: Optional[asyncio.Task] = None
+    
+    def _is_fresh(self, snapshot: LeaderboardSnapshot) -> bool:
+        age = time.monotonic() - snapshot.built_at
+        if self._stale or snapshot.tick != local_days.tick() or age >= self.refresh_interval:
+            return False
+        return rank_index.version == self._rank_version or age < self.min_interval
+    
+    def invalidate(self) -> None:
+        """Force the next read to rebuild."""
+        self._stale = True
+    
+    async def get(self) -> LeaderboardSnapshot:
+        """
+        Get the current snapshot, rebuilding it first if stale.
+        
+        If a rebuild fails the previous snapshot is served, if any.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and self._is_fresh(snapshot):
+            return snapshot
+        
+        if self._inflight is None:
+            self._inflight = asyncio.create_task(self._rebuild())
+            self._inflight.add_done_callback(self._clear_inflight)
+        try:
+            return await asyncio.shield(self._inflight)
+        except Exception as e:
+            if snapshot is None:
+                raise
+            logger.error(f"Leaderboard rebuild failed, serving previous snapshot: {e}")
+            return snapshot
+    
+    def _clear_inflight(self, task: asyncio.Task) -> None:
+        self._inflight = None
+    
+    async def _rebuild(self) -> LeaderboardSnapshot:
+        """Query the top rows and publish a new snapshot."""
+        # Changes from here on trigger another rebuild
+        self._stale = False
+        rank_version = rank_index.version
+        tick = local_days.tick()
+        async with AsyncSessionLocal() as db:
+            entries = await get_leaderboard_entries(db, self.size)
+        
+        previous = self._snapshot
+        version = previous.version + 1 if previous is not None else 1
+        snapshot = LeaderboardSnapshot.build(version, tick, entries)
+        if previous is not None and previous.digest == snapshot.digest:
+            # Same rows: keep the version so clients see no change
+            snapshot = LeaderboardSnapshot(
+                version=previous.version,
+                tick=tick,
+                built_at=snapshot.built_at,
+                blob=previous.blob,
+                row_ends=previous.row_ends,
+                digest=previous.digest
+            )
+        
+        self._snapshot = snapshot
+        self._rank_version = rank_version
+        return snapshot
+
+
+leaderboard_publisher = LeaderboardPublisher(
+    size=LEADERBOARD_MAX_LIMIT,
+    refresh_interval=settings.LEADERBOARD_REFRESH_SECONDS,
+    min_interval=settings.LEADERBOARD_MIN_REBUILD_SECONDS,
+)
@@ -0,0 +1,98 @@
+"""
+User-local calendar days.
+
+Each user sees the challenge for their own local date, and their streak
+is built from those dates. Every UTC offset in use is a multiple of 15
+minutes, so local dates only change on UTC quarter-hour boundaries.
+`LocalDayTable` maps each timezone seen so far to its current date and
+rebuilds that map once per quarter-hour tick. Between ticks, resolving a
+user's day is a dictionary lookup with no timezone arithmetic.
+"""
+import time
+from datetime import date, datetime, time as dt_time, timedelta, timezone, tzinfo
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Local dates change only on these UTC boundaries
+TICK_SECONDS = 15 * 60
+
+# The westernmost zone (UTC-12) finishes a date this long after UTC does
+LATEST_DAY_END_OFFSET = timedelta(hours=12)
+
+
+def seconds_until_last_day_end(day: date) -> float:
+    """Seconds from now until `day` has ended in every timezone."""
+    boundary = datetime.combine(day + timedelta(days=1), dt_time.min, tzinfo=timezone.utc)
+    boundary += LATEST_DAY_END_OFFSET
+    return max((boundary - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class LocalDayTable:
+    """
+    Current local date per timezone, recomputed once per tick.
+    
+    Zones are added on first use. A tick ends on the next UTC quarter
+    hour; the first lookup after that rebuilds the whole table, so the
+    cost is one conversion per known zone per tick. Unknown zone names
+    resolve to UTC. Not thread-safe; intended for use from the event loop
+    only.
+    """
+    
+    def __init__(self, tick_seconds: int = TICK_SECONDS):
+        self.tick_seconds = tick_seconds
+        self._zones: dict[str, tzinfo] = {}
+        self._days: dict[str, date] = {}
+        self.valid_until = 0.0
+    
+    def today(self, zone: str) -> date:
+        """
+        Current date in `zone`.
+        
+        Args:
+            zone: IANA timezone name
+        
+        Returns:
+            The local date
+        """
+        if time.time() >= self.valid_until:
+            self._rebuild()
+        day = self._days.get(zone)
+        if day is None:
+            day = self._add(zone)
+        return day
+    
+    def tick(self) -> float:
+        """
+        End of the current tick, as a UNIX timestamp.
+        
+        Identifies the tick: values derived from local dates (e.g.
+        effective streaks) stay correct while it is unchanged.
+        """
+        if time.time() >= self.valid_until:
+            self._rebuild()
+        return self.valid_until
+    
+    def _rebuild(self) -> None:
+        now = time.time()
+        self.valid_until = (now // self.tick_seconds + 1) * self.tick_seconds
+        instant = datetime.fromtimestamp(now, timezone.utc)
+        self._days = {
+            name: instant.astimezone(zone).date()
+            for name, zone in self._zones.items()
+        }
+    
+    def _add(self, name: str) -> date:
+        try:
+            zone = ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError, OSError):
+            zone = timezone.utc
+        self._zones[name] = zone
+        day = self._days[name] = datetime.now(timezone.utc).astimezone(zone).date()
+        return day
+
+
+local_days = LocalDayTable()
+
+
+def local_today(zone: str) -> date:
+    """Current date in `zone` (see LocalDayTable)."""
+    return local_days.today(zone)
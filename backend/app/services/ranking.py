@@ -0,0 +1,95 @@
+"""
+In-memory rank index over users' total points.
+
+Keeps a Fenwick (binary indexed) tree of user counts per points value,
+so "how many users have more points than me" is an O(log n) lookup
+instead of a COUNT over the users table. Built at startup and updated
+whenever a user's points change.
+"""
+from typing import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+
+from app.models.user import User
+
+
+class PointsRankIndex:
+    """Order-statistic structure over total_points values."""
+    
+    def __init__(self, size: int = 1024):
+        self._counts = [0] * size
+        self._tree = [0] * (size + 1)
+        self.total = 0
+        # Bumped on every change, so readers can tell the ranking moved
+        self.version = 0
+    
+    def _grow(self, points: int) -> None:
+        """Resize so `points` fits, rebuilding the tree in O(n)."""
+        size = len(self._counts)
+        while size <= points:
+            size *= 2
+        self._counts.extend([0] * (size - len(self._counts)))
+        self._tree = [0] * (size + 1)
+        for i, count in enumerate(self._counts, start=1):
+            self._tree[i] += count
+            parent = i + (i & -i)
+            if parent <= size:
+                self._tree[parent] += self._tree[i]
+    
+    def add(self, points: int, delta: int = 1) -> None:
+        """Add `delta` users with `points` points."""
+        if points >= len(self._counts):
+            self._grow(points)
+        self._counts[points] += delta
+        self.total += delta
+        self.version += 1
+        i = points + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+    
+    def move(self, old_points: int, new_points: int) -> None:
+        """Record a user's points changing from `old_points` to `new_points`."""
+        if old_points != new_points:
+            self.add(old_points, -1)
+            self.add(new_points, 1)
+    
+    def count_at_most(self, points: int) -> int:
+        """Number of users with `points` points or fewer."""
+        i = min(points + 1, len(self._tree) - 1)
+        count = 0
+        while i > 0:
+            count += self._tree[i]
+            i -= i & -i
+        return count
+    
+    def rank(self, points: int) -> int:
+        """1-based rank: one more than the users with strictly more points."""
+        return self.total - self.count_at_most(points) + 1
+    
+    def rebuild(self, buckets: Iterable[tuple[int, int]]) -> None:
+        """Replace the contents with (points, user count) pairs."""
+        size = len(self._counts)
+        self._counts = [0] * size
+        self._tree = [0] * (size + 1)
+        self.total = 0
+        for points, count in buckets:
+            self.add(points, count)
+
+
+# Process-wide rank index
+rank_index = PointsRankIndex()
+
+
+async def load_rank_index(db: AsyncSession) -> None:
+    """
+    Rebuild the rank index from the users table.
+    
+    Args:
+        db: Database session
+    """
+    result = await db.execute(
+        select(User.total_points, func.count()).group_by(User.total_points)
+    )
+    rank_index.rebuild(result.all())
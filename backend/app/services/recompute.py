@@ -0,0 +1,369 @@
+"""
+Batch recomputation of user streaks and points.
+
+Rebuilds current_streak, longest_streak, total_points, total_submissions,
+last_completed_date and completion_bitmap for every user from the submissions table, e.g.
+after changing POINTS_MAP or STREAK_BONUS. Submissions are streamed in
+(user, day) order and processed in fixed-size chunks with NumPy, so
+memory stays bounded regardless of table size.
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Optional
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select, update, exists, or_, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal
+from app.models.challenge import Challenge
+from app.models.submission import Submission
+from app.services.completion import COMPLETION_EPOCH
+from app.services.events import EventType, publish
+from app.services.submission import (
+    POINTS_MAP,
+    STREAK_BONUS,
+    STREAK_BONUS_THRESHOLD,
+    users_table,
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Stats columns rebuilt by the engine, in UserStats field order
+STAT_COLUMNS = (
+    "current_streak",
+    "longest_streak",
+    "total_points",
+    "total_submissions",
+    "last_completed_date",
+    "completion_bitmap",
+)
+
+
+@dataclass(slots=True)
+class UserStats:
+    """Recomputed stats for one user."""
+    user_id: UUID
+    current_streak: int
+    longest_streak: int
+    total_points: int
+    total_submissions: int
+    last_completed_date: Optional[date]
+    completion_bitmap: bytes
+
+
+@dataclass
+class RecomputeReport:
+    """Summary of a recomputation run."""
+    dry_run: bool
+    submissions_scanned: int = 0
+    users_scanned: int = 0
+    users_changed: int = 0
+    # Changed users left alone because they were updated during the run
+    users_skipped: int = 0
+    users_reset: int = 0
+    elapsed_seconds: float = 0.0
+    # A bounded sample of (user_id, column, stored, recomputed)
+    examples: list[tuple[UUID, str, object, object]] = field(default_factory=list)
+
+
+def bitmap_from_indexes(indexes: np.ndarray) -> bytes:
+    """
+    Build a completion bitmap with the given bit indexes set.
+    
+    Uses the bit order of app.services.completion; days before the
+    epoch are ignored.
+    """
+    indexes = indexes[indexes >= 0]
+    if len(indexes) == 0:
+        return b""
+    bits = np.zeros(int(indexes.max()) + 1, dtype=np.uint8)
+    bits[indexes] = 1
+    return np.packbits(bits, bitorder="little").tobytes()
+
+
+def compute_user_stats(
+    user_ids: list[UUID],
+    user_codes: np.ndarray,
+    days: np.ndarray,
+    base_points: np.ndarray
+) -> list[UserStats]:
+    """
+    Compute stats for complete per-user runs of submissions.
+    
+    Applies the same rules as next_streak and calculate_points, but over
+    whole arrays: a run of consecutive days starts at each new user or
+    gap of more than one day, and a repeated day does not extend it.
+    
+    Args:
+        user_ids: UUID for each distinct code, in code order
+        user_codes: Per-submission user code, sorted ascending
+        days: Per-submission day ordinal, sorted within each user
+        base_points: Per-submission base points for the difficulty
+    
+    Returns:
+        Stats for each user in `user_ids`
+    """
+    n = len(days)
+    if n == 0:
+        return []
+    
+    user_start = np.ones(n, dtype=bool)
+    user_start[1:] = user_codes[1:] != user_codes[:-1]
+    
+    gap = np.zeros(n, dtype=np.int64)
+    gap[1:] = days[1:] - days[:-1]
+    
+    run_start = user_start | (gap > 1)
+    increments = (run_start | (gap == 1)).astype(np.int64)
+    
+    # Streak at each submission = distinct days since its run started
+    totals = np.cumsum(increments)
+    run_ids = np.cumsum(run_start) - 1
+    run_offsets = totals[run_start] - 1
+    streaks = totals - run_offsets[run_ids]
+    
+    points = base_points + np.where(streaks >= STREAK_BONUS_THRESHOLD, STREAK_BONUS, 0)
+    
+    starts = np.flatnonzero(user_start)
+    ends = np.append(starts[1:], n) - 1
+    
+    total_points = np.add.reduceat(points, starts)
+    longest = np.maximum.reduceat(streaks, starts)
+    counts = ends - starts + 1
+    
+    epoch = COMPLETION_EPOCH.toordinal()
+    
+    return [
+        UserStats(
+            user_id=user_ids[user_codes[start]],
+            current_streak=int(streaks[end]),
+            longest_streak=int(longest[i]),
+            total_points=int(total_points[i]),
+            total_submissions=int(counts[i]),
+            last_completed_date=date.fromordinal(int(days[end])),
+            completion_bitmap=bitmap_from_indexes(days[start:end + 1] - epoch)
+        )
+        for i, (start, end) in enumerate(zip(starts, ends))
+    ]
+
+
+def _chunk_to_stats(rows: list) -> list[UserStats]:
+    """Convert (user_id, active_date, difficulty) rows to stats arrays."""
+    user_ids: list[UUID] = []
+    codes = np.empty(len(rows), dtype=np.int64)
+    days = np.empty(len(rows), dtype=np.int64)
+    base_points = np.empty(len(rows), dtype=np.int64)
+    
+    for i, (user_id, active_date, difficulty) in enumerate(rows):
+        if not user_ids or user_ids[-1] != user_id:
+            user_ids.append(user_id)
+        codes[i] = len(user_ids) - 1
+        days[i] = active_date.toordinal()
+        base_points[i] = POINTS_MAP.get(difficulty.value, 10)
+    
+    return compute_user_stats(user_ids, codes, days, base_points)
+
+
+async def _diff_stats(
+    db: AsyncSession,
+    stats: list[UserStats],
+    report: RecomputeReport,
+    max_examples: int
+) -> list[tuple[UserStats, tuple]]:
+    """
+    Return the stats that differ from what is stored, recording examples.
+    
+    Returns:
+        (recomputed stats, stored values in STAT_COLUMNS order) per changed user
+    """
+    result = await db.execute(
+        select(users_table.c.id, *(users_table.c[name] for name in STAT_COLUMNS))
+        .where(users_table.c.id.in_([s.user_id for s in stats]))
+    )
+    stored = {row[0]: tuple(row[1:]) for row in result.all()}
+    
+    changed = []
+    for s in stats:
+        current = stored.get(s.user_id)
+        if current is None:
+            continue
+        new = tuple(getattr(s, name) for name in STAT_COLUMNS)
+        if new == current:
+            continue
+        changed.append((s, current))
+        for name, old_value, new_value in zip(STAT_COLUMNS, current, new):
+            if old_value != new_value and len(report.examples) < max_examples:
+                report.examples.append((s.user_id, name, old_value, new_value))
+    return changed
+
+
+# One UPDATE per chunk from parallel arrays. A row is written only if it
+# still holds the values _diff_stats read and still has the submissions
+# the stats were computed from; otherwise a submission landed during the
+# run and overwriting it would lose those points.
+WRITE_STATS = text("""
+    UPDATE users
+    SET current_streak = v.current_streak,
+        longest_streak = v.longest_streak,
+        total_points = v.total_points,
+        total_submissions = v.total_submissions,
+        last_completed_date = v.last_completed_date,
+        completion_bitmap = v.completion_bitmap
+    FROM unnest(
+        CAST(:user_ids AS uuid[]),
+        CAST(:current_streak AS integer[]),
+        CAST(:longest_streak AS integer[]),
+        CAST(:total_points AS integer[]),
+        CAST(:total_submissions AS integer[]),
+        CAST(:last_completed_date AS date[]),
+        CAST(:completion_bitmap AS bytea[]),
+        CAST(:old_total_points AS integer[]),
+        CAST(:old_last_completed_date AS date[])
+    ) AS v(
+        user_id, current_streak, longest_streak, total_points, total_submissions,
+        last_completed_date, completion_bitmap, old_total_points, old_last_completed_date
+    )
+    WHERE users.id = v.user_id
+      AND users.total_points = v.old_total_points
+      AND users.last_completed_date IS NOT DISTINCT FROM v.old_last_completed_date
+      AND (SELECT count(*) FROM submissions WHERE submissions.user_id = users.id) = v.total_submissions
+    RETURNING users.id
+""")
+
+
+async def _write_stats(db: AsyncSession, changed: list[tuple[UserStats, tuple]]) -> int:
+    """
+    Bulk-write stats with a single guarded UPDATE.
+    
+    Args:
+        db: Database session
+        changed: Recomputed and stored values, as returned by _diff_stats
+    
+    Returns:
+        Number of users written; the rest changed since they were read
+    """
+    stored_points = STAT_COLUMNS.index("total_points")
+    stored_date = STAT_COLUMNS.index("last_completed_date")
+    params = {"user_ids": [s.user_id for s, _ in changed]}
+    for name in STAT_COLUMNS:
+        params[name] = [getattr(s, name) for s, _ in changed]
+    params["old_total_points"] = [current[stored_points] for _, current in changed]
+    params["old_last_completed_date"] = [current[stored_date] for _, current in changed]
+    
+    result = await db.execute(WRITE_STATS, params)
+    return len(result.all())
+
+
+async def recompute_user_stats(
+    dry_run: bool = False,
+    chunk_size: int = 50_000,
+    max_examples: int = 20
+) -> RecomputeReport:
+    """
+    Rebuild every user's streak and points from their submissions.
+    
+    Reads through a server-side cursor and writes changed users with one
+    UPDATE per chunk, committing as it goes. Users who submit while the
+    run is in progress are skipped rather than overwritten and counted in
+    users_skipped. Rerunning is safe because each write is an absolute
+    value, and picks up the skipped users.
+    
+    Args:
+        dry_run: Only report differences, do not write
+        chunk_size: Submissions fetched per chunk
+        max_examples: Size of the per-column difference sample in the report
+    
+    Returns:
+        Summary of the run
+    """
+    started = time.perf_counter()
+    report = RecomputeReport(dry_run=dry_run)
+    
+    async def process(rows: list) -> None:
+        stats = _chunk_to_stats(rows)
+        report.users_scanned += len(stats)
+        async with AsyncSessionLocal() as writer:
+            changed = await _diff_stats(writer, stats, report, max_examples)
+            report.users_changed += len(changed)
+            if changed and not dry_run:
+                written = await _write_stats(writer, changed)
+                report.users_skipped += len(changed) - written
+                await writer.commit()
+    
+    async with AsyncSessionLocal() as reader:
+        result = await reader.stream(
+            select(Submission.user_id, Challenge.active_date, Challenge.difficulty)
+            .join(Challenge, Challenge.id == Submission.challenge_id)
+            .order_by(Submission.user_id, Challenge.active_date)
+            .execution_options(yield_per=chunk_size)
+        )
+        
+        # The last user in a chunk may continue into the next one, so
+        # their rows are carried over until the user is complete
+        carry: list = []
+        async for partition in result.partitions(chunk_size):
+            rows = carry + list(partition)
+            report.submissions_scanned += len(partition)
+            last_user = rows[-1][0]
+            split = len(rows)
+            while split > 0 and rows[split - 1][0] == last_user:
+                split -= 1
+            carry = rows[split:]
+            if split:
+                await process(rows[:split])
+        if carry:
+            await process(carry)
+    
+    # Users without any submissions should have empty stats
+    async with AsyncSessionLocal() as writer:
+        no_submissions = ~exists().where(Submission.user_id == users_table.c.id)
+        has_stats = or_(
+            users_table.c.current_streak != 0,
+            users_table.c.longest_streak != 0,
+            users_table.c.total_points != 0,
+            users_table.c.total_submissions != 0,
+            users_table.c.last_completed_date.is_not(None),
+            func.length(users_table.c.completion_bitmap) != 0
+        )
+        if dry_run:
+            result = await writer.execute(
+                select(func.count()).select_from(users_table).where(no_submissions, has_stats)
+            )
+            report.users_reset = result.scalar_one()
+        else:
+            result = await writer.execute(
+                update(users_table)
+                .where(no_submissions, has_stats)
+                .values(
+                    current_streak=0,
+                    longest_streak=0,
+                    total_points=0,
+                    total_submissions=0,
+                    last_completed_date=None,
+                    completion_bitmap=b""
+                )
+            )
+            report.users_reset = result.rowcount
+            
+            # Running workers drop their caches and reload ranks
+            await publish(
+                writer,
+                EventType.STATS_RECOMPUTED,
+                users_changed=report.users_changed - report.users_skipped + report.users_reset
+            )
+            await writer.commit()
+    
+    report.elapsed_seconds = time.perf_counter() - started
+    logger.info(
+        f"Recomputed stats for {report.users_scanned} user(s) from "
+        f"{report.submissions_scanned} submission(s) in {report.elapsed_seconds:.1f}s: "
+        f"{report.users_changed} changed, {report.users_skipped} skipped, "
+        f"{report.users_reset} reset"
+        + (" (dry run)" if dry_run else "")
+    )
+    return report
@@ -1,14 +1,24 @@
 """
 Scheduler service for daily background tasks.
 Uses APScheduler to run jobs at midnight UTC.
+
+With several worker processes, only the one holding a Postgres advisory
+lock runs the jobs; the others learn of rotations through the event bus.
 """
+import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Optional
+
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
-from app.database import AsyncSessionLocal
-from app.services.challenge import activate_today_challenge
+from app.config import settings
+from app.database import AsyncSessionLocal, DedicatedConnection, dedicated_connection
+from app.services.challenge import activate_today_challenge, prewarm_challenge
+from app.services.events import EventType, publish
+from app.services.local_day import local_today
+from app.services.submission import expire_stale_streaks
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -16,6 +26,9 @@ logger = logging.getLogger(__name__)
 # Global scheduler instance
 scheduler = AsyncIOScheduler()
 
+# Advisory lock key held by the worker that owns the scheduled jobs
+SCHEDULER_LOCK_ID = 0x6443_6861_6c6c
+
 
 async def daily_challenge_rotation():
     """
@@ -39,6 +52,41 @@ async def daily_challenge_rotation():
             await db.rollback()
 
 
+async def daily_streak_expiry():
+    """
+    Daily job to zero streaks that were not continued yesterday.
+    
+    Runs at 00:05 UTC every day, after the rotation.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            expired = await expire_stale_streaks(db, local_today("UTC"))
+            await db.commit()
+            logger.info(f"Expired {expired} stale streak(s)")
+        except Exception as e:
+            logger.error(f"Error in daily streak expiry: {e}")
+            await db.rollback()
+
+
+async def next_challenge_prewarm():
+    """
+    Daily job to stage tomorrow's challenge in every worker.
+    
+    Runs CHALLENGE_PREWARM_MINUTES before midnight UTC. This worker
+    prewarms itself and asks the others to do the same.
+    """
+    tomorrow = local_today("UTC") + timedelta(days=1)
+    
+    async with AsyncSessionLocal() as db:
+        try:
+            await prewarm_challenge(db, tomorrow)
+            await publish(db, EventType.CHALLENGE_PREWARM, day=tomorrow)
+            await db.commit()
+        except Exception as e:
+            logger.error(f"Error in next challenge prewarm: {e}")
+            await db.rollback()
+
+
 def start_scheduler():
     """Start the background scheduler."""
     # Add daily challenge rotation job - runs at midnight UTC
@@ -50,6 +98,25 @@ def start_scheduler():
         replace_existing=True
     )
     
+    # Add streak expiry job - runs shortly after the rotation
+    scheduler.add_job(
+        daily_streak_expiry,
+        CronTrigger(hour=0, minute=5, timezone="UTC"),
+        id="daily_streak_expiry",
+        name="Daily Streak Expiry",
+        replace_existing=True
+    )
+    
+    # Add prewarm job - runs shortly before midnight
+    prewarm_at = 24 * 60 - settings.CHALLENGE_PREWARM_MINUTES
+    scheduler.add_job(
+        next_challenge_prewarm,
+        CronTrigger(hour=prewarm_at // 60, minute=prewarm_at % 60, timezone="UTC"),
+        id="next_challenge_prewarm",
+        name="Next Challenge Prewarm",
+        replace_existing=True
+    )
+    
     scheduler.start()
     logger.info("Scheduler started successfully")
 
@@ -58,3 +125,91 @@ def stop_scheduler():
     """Stop the background scheduler."""
     scheduler.shutdown()
     logger.info("Scheduler stopped")
+
+
+class SchedulerLeadership:
+    """
+    Elects one worker process to own the scheduled jobs.
+    
+    Each worker tries pg_try_advisory_lock on its dedicated connection.
+    The holder activates today's challenge and runs the scheduler; the
+    lock is released when that connection closes, so another worker
+    takes over on its next retry.
+    """
+    
+    def __init__(self, retry_interval: float, connection: DedicatedConnection = dedicated_connection):
+        self.retry_interval = retry_interval
+        self.connection = connection
+        self.is_leader = False
+        # Connection generation the lock is held on
+        self._generation = 0
+        self._task: Optional[asyncio.Task] = None
+    
+    async def start(self) -> None:
+        """Try to take leadership now, then keep checking in the background."""
+        await self._tick()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop the background loop and give up leadership."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.is_leader:
+            self.is_leader = False
+            try:
+                await self.connection.fetchval("SELECT pg_advisory_unlock($1)", SCHEDULER_LOCK_ID)
+            except Exception as e:
+                # Closing the connection at shutdown releases it anyway
+                logger.warning(f"Could not release scheduler lock: {e}")
+        if scheduler.running:
+            stop_scheduler()
+    
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.retry_interval)
+            await self._tick()
+    
+    async def _tick(self) -> None:
+        """Try to lead, or check the held lock is still there."""
+        try:
+            if self.is_leader:
+                # The lock lives as long as the connection it was taken on
+                _, generation = await self.connection.fetchval("SELECT 1")
+                if generation == self._generation:
+                    return
+                self._on_demoted()
+            acquired, generation = await self.connection.fetchval(
+                "SELECT pg_try_advisory_lock($1)", SCHEDULER_LOCK_ID
+            )
+            if acquired:
+                self._generation = generation
+                await self._on_elected()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Scheduler leadership check failed: {e}")
+            self._on_demoted()
+            await self.connection.close()
+    
+    async def _on_elected(self) -> None:
+        self.is_leader = True
+        logger.info("This worker owns the scheduled jobs")
+        await daily_challenge_rotation()
+        if scheduler.running:
+            scheduler.resume()
+        else:
+            start_scheduler()
+    
+    def _on_demoted(self) -> None:
+        if self.is_leader:
+            self.is_leader = False
+            scheduler.pause()
+            logger.warning("Lost scheduler leadership; jobs paused")
+
+
+scheduler_leadership = SchedulerLeadership(retry_interval=settings.SCHEDULER_LEADER_RETRY_SECONDS)
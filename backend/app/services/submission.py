@@ -7,12 +7,19 @@ from typing import Optional
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import Date, select, update, and_, case, cast, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
+from app.database import after_commit
 from app.models.user import User
 from app.models.challenge import Challenge
 from app.models.submission import Submission, SubmissionType
 from app.schemas.submission import SubmissionCreate
+from app.services.auth import invalidate_principal
+from app.services.challenge_cache import ChallengeSnapshot
+from app.services.completion import bitmap_with_day
+from app.services.events import EventType, publish
+from app.services.ranking import rank_index
 
 
 # Points configuration
@@ -45,6 +52,36 @@ def calculate_points(difficulty: str, current_streak: int) -> int:
     return base_points
 
 
+def next_streak(
+    last_completed_date: Optional[date],
+    current_streak: int,
+    submission_date: date
+) -> int:
+    """
+    Compute a user's current streak after completing `submission_date`.
+    
+    Args:
+        last_completed_date: Day of the user's previous completion
+        current_streak: User's streak before this submission
+        submission_date: Date of submission
+    
+    Returns:
+        New current streak value
+    """
+    if last_completed_date is None:
+        # First ever submission
+        return 1
+    if last_completed_date == submission_date - timedelta(days=1):
+        # Consecutive day - increment streak
+        return current_streak + 1
+    if last_completed_date == submission_date:
+        # Same day submission - no change to streak
+        # This shouldn't happen due to unique constraint, but handle gracefully
+        return current_streak
+    # Streak broken (skipped one or more days) - reset to 1
+    return 1
+
+
 def update_streak(
     user: User,
     submission_date: date
@@ -65,97 +102,241 @@ def update_streak(
     Returns:
         New current streak value
     """
-    today = submission_date
-    
-    if user.last_completed_date is None:
-        # First ever submission
-        user.current_streak = 1
-    elif user.last_completed_date == today - timedelta(days=1):
-        # Consecutive day - increment streak
-        user.current_streak += 1
-    elif user.last_completed_date == today:
-        # Same day submission - no change to streak
-        # This shouldn't happen due to unique constraint, but handle gracefully
-        pass
-    else:
-        # Streak broken (skipped one or more days) - reset to 1
-        user.current_streak = 1
+    user.current_streak = next_streak(
+        user.last_completed_date, user.current_streak, submission_date
+    )
     
     # Update longest streak if current exceeds it
     if user.current_streak > user.longest_streak:
         user.longest_streak = user.current_streak
     
     # Update last completed date
-    user.last_completed_date = today
+    user.last_completed_date = submission_date
     
     return user.current_streak
 
 
+# Core table for set-based statements (usable with executemany)
+users_table = User.__table__
+
+
+def effective_streak(
+    current_streak: int,
+    last_completed_date: Optional[date],
+    today: date
+) -> int:
+    """
+    Streak as of `today`, expiring streaks that were not continued.
+    
+    The stored current_streak only changes on submit, so a user who
+    stopped playing keeps their old value. It is still alive if they
+    completed today's or yesterday's challenge; otherwise it is 0.
+    
+    Args:
+        current_streak: Stored streak value
+        last_completed_date: Day of the user's last completion
+        today: Day to evaluate the streak for
+    
+    Returns:
+        Effective current streak
+    """
+    if last_completed_date is None or last_completed_date < today - timedelta(days=1):
+        return 0
+    return current_streak
+
+
+def effective_streak_now():
+    """
+    SQL expression for effective_streak as of each user's local day now.
+    
+    Lets queries order by the streak they display. It depends on now(),
+    so it cannot be indexed itself.
+    """
+    local_today = cast(func.timezone(users_table.c.timezone, func.now()), Date)
+    return case(
+        (users_table.c.last_completed_date >= local_today - 1, users_table.c.current_streak),
+        else_=0
+    )
+
+
+async def expire_stale_streaks(db: AsyncSession, today: date) -> int:
+    """
+    Zero the stored streak of users whose streak broke by today.
+    
+    Users play on their local dates, which run up to a day behind UTC,
+    so a streak is only certainly broken everywhere once its last
+    completion is at least three UTC days old. Only users still holding
+    a streak are touched, found via the partial ix_users_live_streaks
+    index, so the cost tracks the number of broken streaks rather than
+    the users table, and a missed run is caught up by the next one. Reads
+    use effective_streak with each user's local day, so a missed or late
+    run only leaves stored values stale, never visible.
+    
+    Runs in the caller's transaction; the caller commits.
+    
+    Args:
+        db: Database session
+        today: UTC day whose streaks are evaluated
+    
+    Returns:
+        Number of users updated
+    """
+    result = await db.execute(
+        update(users_table)
+        .where(
+            users_table.c.last_completed_date <= today - timedelta(days=3),
+            users_table.c.current_streak > 0
+        )
+        .values(current_streak=0)
+    )
+    return result.rowcount
+
+
+def streak_after(day: date):
+    """
+    SQL expression for a user's current_streak after completing `day`.
+    
+    Mirrors next_streak so the new streak can be computed inside a
+    single UPDATE. Column references read the row's pre-update values.
+    """
+    return case(
+        (users_table.c.last_completed_date == day - timedelta(days=1), users_table.c.current_streak + 1),
+        (users_table.c.last_completed_date == day, users_table.c.current_streak),
+        else_=1
+    )
+
+
+def points_after(difficulty: str, day: date):
+    """SQL expression for calculate_points given the streak after `day`."""
+    base_points = POINTS_MAP.get(difficulty.lower(), 10)
+    return base_points + case(
+        (streak_after(day) >= STREAK_BONUS_THRESHOLD, STREAK_BONUS),
+        else_=0
+    )
+
+
+def user_stats_update(day: date, user_id, points):
+    """
+    UPDATE applying one completed submission on `day` to a user's stats
+    and completion bitmap.
+    
+    `user_id` and `points` may be values or bind parameters, so the same
+    statement serves a single submit and a batched executemany.
+    """
+    return (
+        update(users_table)
+        .where(users_table.c.id == user_id)
+        .values(
+            current_streak=streak_after(day),
+            longest_streak=func.greatest(users_table.c.longest_streak, streak_after(day)),
+            total_points=users_table.c.total_points + points,
+            total_submissions=users_table.c.total_submissions + 1,
+            last_completed_date=day,
+            completion_bitmap=bitmap_with_day(users_table.c.completion_bitmap, day)
+        )
+    )
+
+
+def validate_submittable(challenge: Challenge | ChallengeSnapshot, today: date) -> None:
+    """
+    Check that a challenge accepts submissions today.
+    
+    `today` is the user's local date. The is_active flag follows the UTC
+    rotation, so it is not consulted: a challenge is open exactly while
+    its date is the user's current day.
+    
+    Raises:
+        ValueError: If challenge is not the user's current challenge
+    """
+    if challenge.active_date != today:
+        raise ValueError("Cannot submit for past or future challenges")
+
+
 async def create_submission(
     db: AsyncSession,
-    user: User,
-    challenge: Challenge,
-    submission_data: SubmissionCreate
+    user_id: UUID,
+    challenge: Challenge | ChallengeSnapshot,
+    submission_data: SubmissionCreate,
+    today: date
 ) -> Submission:
     """
     Create a new submission and update user stats.
     
+    Runs as two statements in the caller's transaction:
+    - INSERT ... ON CONFLICT DO NOTHING RETURNING, with points computed
+      from the user's row; the unique_user_challenge_submission
+      constraint rejects duplicates
+    - a relative UPDATE of the user's streak and totals, so concurrent
+      submits can never lose a points update
+    
     Args:
         db: Database session
-        user: Submitting user
+        user_id: Submitting user's UUID
         challenge: Challenge being submitted for
         submission_data: Submission data
+        today: The user's local date; streaks count these days
     
     Returns:
         Created submission
     
     Raises:
-        ValueError: If challenge is not active or user already submitted
+        ValueError: If challenge is not the user's current one or user already submitted
     """
-    today = date.today()
-    
-    # Validate challenge is today's challenge and active
-    if challenge.active_date != today:
-        raise ValueError("Cannot submit for past or future challenges")
-    
-    if not challenge.is_active:
-        raise ValueError("Challenge is not active")
+    validate_submittable(challenge, today)
     
-    # Check if user already submitted
-    existing = await db.execute(
-        select(Submission).where(
-            and_(
-                Submission.user_id == user.id,
-                Submission.challenge_id == challenge.id
-            )
+    # Insert the submission; points come from the user's current streak
+    result = await db.execute(
+        pg_insert(Submission)
+        .values(
+            user_id=user_id,
+            challenge_id=challenge.id,
+            content=submission_data.content,
+            submission_type=submission_data.submission_type.value,
+            completed=submission_data.completed,
+            # Reads the user's row without locking it, but cannot disagree
+            # with the locked UPDATE below: only one challenge is
+            # submittable per user per local day, and ON CONFLICT drops a
+            # concurrent duplicate, so no other submit that changes this
+            # user's streak can commit in between
+            points_awarded=(
+                select(points_after(challenge.difficulty.value, today))
+                .where(users_table.c.id == user_id)
+                .scalar_subquery()
+            ),
+            submitted_at=datetime.utcnow()
         )
+        .on_conflict_do_nothing(constraint="unique_user_challenge_submission")
+        .returning(Submission)
     )
-    if existing.scalar_one_or_none():
-        raise ValueError("You have already submitted for this challenge")
-    
-    # Update streak
-    new_streak = update_streak(user, today)
+    submission = result.scalar_one_or_none()
     
-    # Calculate points
-    points = calculate_points(challenge.difficulty.value, new_streak)
+    if submission is None:
+        raise ValueError("You have already submitted for this challenge")
     
-    # Update user's total points
-    user.total_points += points
+    # Apply streak and points atomically
+    result = await db.execute(
+        user_stats_update(today, user_id, submission.points_awarded)
+        .returning(users_table.c.total_points)
+    )
+    new_points = result.scalar_one()
+    old_points = new_points - submission.points_awarded
     
-    # Create submission
-    submission = Submission(
-        user_id=user.id,
-        challenge_id=challenge.id,
-        content=submission_data.content,
-        submission_type=submission_data.submission_type.value,
-        completed=submission_data.completed,
-        points_awarded=points,
-        submitted_at=datetime.utcnow()
+    # Other workers update their caches when this commits
+    await publish(
+        db,
+        EventType.SUBMISSION_CREATED,
+        user_id=user_id,
+        old_points=old_points,
+        new_points=new_points
     )
     
-    db.add(submission)
-    await db.flush()
-    await db.refresh(submission)
+    def apply_locally() -> None:
+        rank_index.move(old_points, new_points)
+        # Streak and points changed - drop the cached principal
+        invalidate_principal(user_id)
+    
+    # Only once the new stats are visible to other requests
+    after_commit(db, apply_locally)
     
     return submission
 
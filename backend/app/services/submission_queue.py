@@ -0,0 +1,536 @@
+"""
+Write-behind queue for challenge submissions.
+
+When SUBMISSION_WRITE_BEHIND is enabled, submissions are validated and
+acknowledged from memory, then flushed to Postgres in batches: per
+submission day, one INSERT ... SELECT ... ON CONFLICT DO NOTHING that
+computes points from the user's row, and one executemany UPDATE of user
+stats. Acknowledged submissions are appended to a
+local spill file before the response is sent and replayed on startup,
+so a crash between acknowledgement and flush does not lose them.
+
+Each worker appends to its own file in the spill directory and holds an
+exclusive flock on it while alive. At startup a worker adopts the files
+whose lock it can take, i.e. those left by workers that have exited:
+their records move into its own queue and file, then the orphan is
+deleted. Replaying a record that was already written is harmless; the
+unique constraint drops it.
+
+If the database refuses a batch (e.g. a foreign key violation), its rows
+are retried one at a time and the ones refused again are set aside in
+rejected.jsonl, so one bad row cannot block the queue.
+"""
+import asyncio
+import json
+import logging
+import os
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Not POSIX: spill files are unavailable
+    fcntl = None
+from collections import deque
+from dataclasses import dataclass, asdict
+from datetime import date, datetime
+from itertools import groupby
+from typing import Optional, TextIO
+from uuid import UUID
+
+from sqlalchemy import select, bindparam, column, values
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.challenge import Challenge
+from app.models.submission import Submission
+from app.schemas.submission import SubmissionCreate
+from app.services.auth import Principal, invalidate_principal
+from app.services.challenge_cache import ChallengeSnapshot
+from app.services.events import EventType, publish_many
+from app.services.local_day import local_today
+from app.services.ranking import rank_index
+from app.services.submission import (
+    calculate_points,
+    next_streak,
+    points_after,
+    user_stats_update,
+    users_table,
+    validate_submittable,
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+submissions_table = Submission.__table__
+
+# Submission columns copied from a batch; points_awarded is computed
+PENDING_COLUMNS = (
+    "id",
+    "user_id",
+    "challenge_id",
+    "content",
+    "submission_type",
+    "completed",
+    "submitted_at",
+)
+
+# Rows the database refused, appended in the spill directory
+REJECTED_FILE = "rejected.jsonl"
+
+
+class SubmissionQueueFull(Exception):
+    """Raised when the write-behind queue cannot accept more submissions."""
+    pass
+
+
+@dataclass(slots=True)
+class PendingSubmission:
+    """An acknowledged submission waiting to be written."""
+    id: UUID
+    user_id: UUID
+    challenge_id: UUID
+    content: Optional[str]
+    submission_type: str
+    completed: bool
+    difficulty: str
+    # Estimated from the principal for the acknowledgement; the stored
+    # value is computed from the user's row when the batch is written
+    points_awarded: int
+    submitted_at: datetime
+    day: date
+    
+    def to_json(self) -> str:
+        data = asdict(self)
+        for key in ("id", "user_id", "challenge_id"):
+            data[key] = str(data[key])
+        data["submitted_at"] = self.submitted_at.isoformat()
+        data["day"] = self.day.isoformat()
+        return json.dumps(data)
+    
+    @classmethod
+    def from_json(cls, line: str) -> "PendingSubmission":
+        data = json.loads(line)
+        for key in ("id", "user_id", "challenge_id"):
+            data[key] = UUID(data[key])
+        data["submitted_at"] = datetime.fromisoformat(data["submitted_at"])
+        data["day"] = date.fromisoformat(data["day"])
+        return cls(**data)
+
+
+class SubmissionQueue:
+    """Bounded in-process queue flushed to Postgres in batches."""
+    
+    def __init__(
+        self,
+        max_size: int,
+        batch_size: int,
+        flush_interval: float,
+        spill_dir: Optional[str] = None,
+        spill_fsync: bool = True
+    ):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_dir = spill_dir or None
+        self.spill_fsync = spill_fsync
+        # This worker's spill file, open and locked while running
+        self.spill_path: Optional[str] = None
+        self._spill: Optional[TextIO] = None
+        # Rows set aside because the database refused them
+        self.rejected_count = 0
+        self._items: deque[PendingSubmission] = deque()
+        self._keys: set[tuple[UUID, UUID]] = set()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def submit(
+        self,
+        principal: Principal,
+        challenge: Challenge | ChallengeSnapshot,
+        submission_data: SubmissionCreate
+    ) -> PendingSubmission:
+        """
+        Validate and acknowledge a submission without touching the database.
+        
+        The acknowledgement reports points estimated from the principal's
+        streak. The points stored are computed when the batch is written,
+        from the user's row, as on the synchronous path. The unique
+        constraint still guards duplicates that slip past the in-memory
+        checks.
+        
+        Raises:
+            ValueError: If challenge is not the user's current one or user already submitted
+            SubmissionQueueFull: If the queue is at capacity
+        """
+        today = local_today(principal.timezone)
+        validate_submittable(challenge, today)
+        
+        key = (principal.id, challenge.id)
+        if key in self._keys or principal.last_completed_date == today:
+            raise ValueError("You have already submitted for this challenge")
+        
+        if len(self._items) >= self.max_size:
+            raise SubmissionQueueFull()
+        
+        streak = next_streak(principal.last_completed_date, principal.current_streak, today)
+        pending = PendingSubmission(
+            id=uuid.uuid4(),
+            user_id=principal.id,
+            challenge_id=challenge.id,
+            content=submission_data.content,
+            submission_type=submission_data.submission_type.value,
+            completed=submission_data.completed,
+            difficulty=challenge.difficulty.value,
+            points_awarded=calculate_points(challenge.difficulty.value, streak),
+            submitted_at=datetime.utcnow(),
+            day=today
+        )
+        
+        self._append_spill([pending])
+        self._push(pending)
+        return pending
+    
+    def _push(self, pending: PendingSubmission) -> None:
+        self._items.append(pending)
+        self._keys.add((pending.user_id, pending.challenge_id))
+    
+    def _append_spill(self, items: list[PendingSubmission]) -> None:
+        """Append items to this worker's spill file before they are acknowledged."""
+        if self._spill is None:
+            return
+        for pending in items:
+            self._spill.write(pending.to_json() + "\n")
+        self._sync(self._spill)
+    
+    def _sync(self, f: TextIO) -> None:
+        f.flush()
+        if self.spill_fsync:
+            os.fsync(f.fileno())
+    
+    def _open_spill(self) -> None:
+        """Create and lock this worker's spill file."""
+        if fcntl is None:
+            raise RuntimeError("SUBMISSION_SPILL_DIR needs POSIX file locks (fcntl)")
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self.spill_path = os.path.join(
+            self.spill_dir, f"spill-{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl"
+        )
+        self._spill = open(self.spill_path, "a", encoding="utf-8")
+        fcntl.flock(self._spill, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    
+    def _close_spill(self) -> None:
+        """Close this worker's spill file, deleting it if nothing is pending."""
+        if self._spill is None:
+            return
+        if not self._items:
+            os.unlink(self.spill_path)
+        self._spill.close()
+        self._spill = None
+        self.spill_path = None
+    
+    def _rewrite_spill(self) -> None:
+        """Shrink this worker's spill file to the items still pending."""
+        if self._spill is None:
+            return
+        if not self._items:
+            self._spill.truncate(0)
+            self._sync(self._spill)
+            return
+        # The new file is locked before it replaces the old one, so other
+        # workers never see this worker's file unlocked
+        f = open(self.spill_path + ".tmp", "a", encoding="utf-8")
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        for pending in self._items:
+            f.write(pending.to_json() + "\n")
+        self._sync(f)
+        os.replace(f.name, self.spill_path)
+        self._spill.close()
+        self._spill = f
+    
+    def _adopt_orphans(self) -> int:
+        """
+        Queue submissions from spill files left by exited workers.
+        
+        Runs under a directory lock so two starting workers cannot adopt
+        the same file. Files whose lock is held belong to live workers.
+        """
+        count = 0
+        with open(os.path.join(self.spill_dir, ".adopt.lock"), "w") as dir_lock:
+            fcntl.flock(dir_lock, fcntl.LOCK_EX)
+            for name in sorted(os.listdir(self.spill_dir)):
+                path = os.path.join(self.spill_dir, name)
+                if not name.startswith("spill-") or path == self.spill_path:
+                    continue
+                with open(path, encoding="utf-8") as f:
+                    try:
+                        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue
+                    try:
+                        if os.fstat(f.fileno()).st_ino != os.stat(path).st_ino:
+                            # Replaced by its (live) owner since we opened it
+                            continue
+                    except FileNotFoundError:
+                        continue
+                    if name.endswith(".tmp"):
+                        # Interrupted rewrite; the file it was replacing is complete
+                        os.unlink(path)
+                        continue
+                    adopted = self._read_spill(f)
+                    # Durable in our own file before the orphan goes away
+                    self._append_spill(adopted)
+                    for pending in adopted:
+                        self._push(pending)
+                    count += len(adopted)
+                    os.unlink(path)
+        return count
+    
+    def _read_spill(self, f: TextIO) -> list[PendingSubmission]:
+        """Read a spill file's records that are not already queued."""
+        items = []
+        seen: set[tuple[UUID, UUID]] = set()
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                pending = PendingSubmission.from_json(line)
+            except (ValueError, KeyError, TypeError):
+                logger.warning("Skipping unreadable spill record")
+                continue
+            key = (pending.user_id, pending.challenge_id)
+            if key not in self._keys and key not in seen:
+                seen.add(key)
+                items.append(pending)
+        return items
+    
+    async def flush(self) -> int:
+        """
+        Write up to one batch to the database.
+        
+        Returns:
+            Number of submissions taken off the queue
+        """
+        async with self._flush_lock:
+            batch = list(self._items)[:self.batch_size]
+            if not batch:
+                return 0
+            
+            rejected: list[PendingSubmission] = []
+            try:
+                written, changes = await self._write(batch)
+            except (IntegrityError, DataError) as e:
+                # One bad row (e.g. its user was deleted) fails the whole
+                # INSERT; write the rows one at a time to isolate it
+                logger.warning(
+                    f"Batch of {len(batch)} queued submission(s) failed, "
+                    f"retrying one at a time: {e.orig}"
+                )
+                written, changes, rejected = await self._write_one_at_a_time(batch)
+            
+            for pending in batch:
+                self._items.popleft()
+                self._keys.discard((pending.user_id, pending.challenge_id))
+            self._rewrite_spill()
+            if rejected:
+                self._set_aside(rejected)
+            
+            self._apply_changes(changes)
+            
+            duplicates = len(batch) - written - len(rejected)
+            if duplicates:
+                logger.warning(f"Dropped {duplicates} duplicate queued submission(s)")
+            return len(batch)
+    
+    async def _write(self, batch: list[PendingSubmission]) -> tuple[int, dict[UUID, tuple[int, int]]]:
+        """Write a batch in its own transaction (see _write_batch)."""
+        async with AsyncSessionLocal() as db:
+            try:
+                result = await self._write_batch(db, batch)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+        return result
+    
+    async def _write_one_at_a_time(
+        self,
+        batch: list[PendingSubmission]
+    ) -> tuple[int, dict[UUID, tuple[int, int]], list[PendingSubmission]]:
+        """
+        Write each row in its own transaction.
+        
+        Rows that fail with an integrity or data error are returned as
+        rejected; any other error (e.g. a lost connection) propagates and
+        the batch stays queued. Rows already committed are then written
+        again on retry as harmless duplicates.
+        
+        Returns:
+            Rows written, changes as in _write_batch, rejected rows
+        """
+        written = 0
+        changes: dict[UUID, tuple[int, int]] = {}
+        rejected: list[PendingSubmission] = []
+        try:
+            for pending in batch:
+                try:
+                    count, row_changes = await self._write([pending])
+                except (IntegrityError, DataError) as e:
+                    logger.error(f"Rejected queued submission {pending.id}: {e.orig}")
+                    rejected.append(pending)
+                    continue
+                written += count
+                for user_id, (old_points, new_points) in row_changes.items():
+                    changes[user_id] = (changes.get(user_id, (old_points,))[0], new_points)
+        except Exception:
+            # Committed rows still change this worker's views
+            self._apply_changes(changes)
+            raise
+        return written, changes, rejected
+    
+    def _apply_changes(self, changes: dict[UUID, tuple[int, int]]) -> None:
+        """Refresh in-process views of the users whose stats were committed."""
+        for user_id, (old_points, new_points) in changes.items():
+            rank_index.move(old_points, new_points)
+            invalidate_principal(user_id)
+    
+    def _set_aside(self, rejected: list[PendingSubmission]) -> None:
+        """Keep rows the database refused, so they can be inspected and replayed."""
+        self.rejected_count += len(rejected)
+        if self.spill_dir:
+            with open(os.path.join(self.spill_dir, REJECTED_FILE), "a", encoding="utf-8") as f:
+                for pending in rejected:
+                    f.write(pending.to_json() + "\n")
+                self._sync(f)
+        else:
+            for pending in rejected:
+                logger.error(f"Rejected submission record: {pending.to_json()}")
+    
+    async def _write_batch(
+        self,
+        db,
+        batch: list[PendingSubmission]
+    ) -> tuple[int, dict[UUID, tuple[int, int]]]:
+        """
+        Insert a batch and apply user stats for the rows actually inserted.
+        
+        Rows are written one submission day at a time, oldest first, so
+        points_after reads each user's streak as of their previous
+        submission, exactly as create_submission does. Every row of a
+        day shares that day's challenge and so its difficulty.
+        
+        Returns:
+            (rows inserted, mapping of user ID to (old points, new points))
+        """
+        conn = await db.connection()
+        
+        written = 0
+        points_by_user: dict[UUID, int] = {}
+        batch = sorted(batch, key=lambda p: (p.day, p.difficulty))
+        for (day, difficulty), group in groupby(batch, key=lambda p: (p.day, p.difficulty)):
+            pending = values(
+                *(column(name, submissions_table.c[name].type) for name in PENDING_COLUMNS),
+                name="pending"
+            ).data([tuple(getattr(p, name) for name in PENDING_COLUMNS) for p in group])
+            
+            # Outer join: a row whose user is gone fails the foreign key
+            # rather than vanishing, so it can be set aside
+            result = await conn.execute(
+                pg_insert(submissions_table)
+                .from_select(
+                    [*PENDING_COLUMNS, "points_awarded"],
+                    select(*pending.c, points_after(difficulty, day))
+                    .select_from(pending.outerjoin(users_table, users_table.c.id == pending.c.user_id))
+                )
+                .on_conflict_do_nothing(constraint="unique_user_challenge_submission")
+                .returning(submissions_table.c.user_id, submissions_table.c.points_awarded)
+            )
+            inserted = result.all()
+            if not inserted:
+                continue
+            
+            await conn.execute(
+                user_stats_update(day, bindparam("b_user_id"), bindparam("b_points")),
+                [{"b_user_id": user_id, "b_points": points} for user_id, points in inserted]
+            )
+            written += len(inserted)
+            for user_id, points in inserted:
+                points_by_user[user_id] = points_by_user.get(user_id, 0) + points
+        
+        if not written:
+            return 0, {}
+        
+        result = await conn.execute(
+            select(users_table.c.id, users_table.c.total_points)
+            .where(users_table.c.id.in_(points_by_user.keys()))
+        )
+        changes = {
+            user_id: (total - points_by_user[user_id], total)
+            for user_id, total in result.all()
+        }
+        
+        await publish_many(db, EventType.SUBMISSION_CREATED, [
+            {"user_id": user_id, "old_points": old_points, "new_points": new_points}
+            for user_id, (old_points, new_points) in changes.items()
+        ])
+        return written, changes
+    
+    async def _run(self) -> None:
+        """Background loop flushing batches on an interval."""
+        while True:
+            try:
+                if not self._items:
+                    await asyncio.sleep(self.flush_interval)
+                    continue
+                flushed = await self.flush()
+                if flushed < self.batch_size:
+                    await asyncio.sleep(self.flush_interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error flushing submission queue: {e}")
+                await asyncio.sleep(self.flush_interval)
+    
+    async def start(self) -> None:
+        """Replay orphaned spill files and start the background flusher."""
+        if self.spill_dir:
+            self._open_spill()
+            replayed = self._adopt_orphans()
+            if replayed:
+                logger.info(f"Replaying {replayed} spilled submission(s)")
+        self._task = asyncio.create_task(self._run())
+        logger.info("Submission write-behind queue started")
+    
+    async def stop(self) -> None:
+        """Stop the flusher and write everything still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._items:
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(
+                    f"Could not flush {len(self._items)} queued submission(s) at shutdown: {e}"
+                )
+                break
+        self._close_spill()
+        logger.info("Submission write-behind queue stopped")
+
+
+submission_queue = SubmissionQueue(
+    max_size=settings.SUBMISSION_QUEUE_MAX_SIZE,
+    batch_size=settings.SUBMISSION_FLUSH_BATCH_SIZE,
+    flush_interval=settings.SUBMISSION_FLUSH_INTERVAL_SECONDS,
+    spill_dir=settings.SUBMISSION_SPILL_DIR,
+    spill_fsync=settings.SUBMISSION_SPILL_FSYNC,
+)
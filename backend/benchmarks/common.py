@@ -0,0 +1,90 @@
+"""
+Shared setup for the benchmark scripts (see benchmarks/__init__.py).
+"""
+import logging
+import os
+import sys
+
+BENCHMARK_DATABASE_URL = os.environ.get("BENCHMARK_DATABASE_URL", "")
+if not BENCHMARK_DATABASE_URL:
+    sys.exit("Set BENCHMARK_DATABASE_URL to a throwaway database; its tables are dropped")
+# Must be set before app.config is imported
+os.environ["DATABASE_URL"] = BENCHMARK_DATABASE_URL
+
+from datetime import datetime  # noqa: E402
+
+import httpx  # noqa: E402
+
+import app.models  # noqa: E402,F401  (registers every table)
+from app.database import AsyncSessionLocal, create_tables, drop_tables, engine  # noqa: E402
+from app.models.challenge import Challenge, ChallengeCategory, ChallengeDifficulty  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.auth import create_access_token  # noqa: E402
+from app.services.invalidation import resynchronize  # noqa: E402
+from app.services.local_day import local_today  # noqa: E402
+from benchmarks.report import percentile, print_table  # noqa: E402,F401
+
+# Keep SQL echo (on with DEBUG) and request logs out of the timings
+engine.echo = False
+logging.disable(logging.WARNING)
+
+# bcrypt hash of "secret1"; verifying it costs the same as any other
+SEEDED_PASSWORD = "secret1"
+SEEDED_PASSWORD_HASH = "$2b$12$AAupeW0yp2ulzz0kZB4ri.WyTqIesJARfsZH869KGuC/TM9mvccy."
+
+
+async def reset_database() -> None:
+    """Recreate empty tables and drop in-process caches."""
+    await drop_tables()
+    await create_tables()
+    await resynchronize()
+
+
+async def seed_today_challenge() -> Challenge:
+    """Insert today's (UTC) active challenge."""
+    async with AsyncSessionLocal() as db:
+        challenge = Challenge(
+            title="Benchmark challenge",
+            description="Write down one thing you learned today.",
+            category=ChallengeCategory.LIFE,
+            difficulty=ChallengeDifficulty.EASY,
+            active_date=local_today("UTC"),
+            is_active=True,
+            created_at=datetime.utcnow()
+        )
+        db.add(challenge)
+        await db.commit()
+    return challenge
+
+
+async def seed_users(count: int, prefix: str = "user") -> list[User]:
+    """Insert `count` users with password SEEDED_PASSWORD."""
+    users = [
+        User(
+            username=f"{prefix}{i}",
+            email=f"{prefix}{i}@example.com",
+            hashed_password=SEEDED_PASSWORD_HASH,
+            current_streak=0,
+            longest_streak=0,
+            total_points=0,
+            total_submissions=0
+        )
+        for i in range(count)
+    ]
+    async with AsyncSessionLocal() as db:
+        db.add_all(users)
+        await db.commit()
+    await resynchronize()
+    return users
+
+
+def auth_headers(user: User) -> dict:
+    """Bearer token headers for `user`."""
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': str(user.id)})}"}
+
+
+def app_client() -> httpx.AsyncClient:
+    """HTTP client calling the app in this process and event loop."""
+    from app.main import app
+    
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
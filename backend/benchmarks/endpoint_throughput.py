@@ -0,0 +1,143 @@
+"""
+Requests per second for each read endpoint, standard encoder vs orjson.
+
+Seeds a year of challenges and a pool of users, then drives each
+endpoint with a fixed number of requests in flight through the
+in-process ASGI client, once per FAST_JSON setting. FAST_JSON is read at
+import, so each setting runs in its own subprocess against the same
+data. Responses are requested uncompressed so encoding, not gzip, is
+what differs between the runs.
+
+Run with: python -m benchmarks.endpoint_throughput [--requests N] [--concurrency C] [--users U]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from benchmarks.common import (
+    app_client,
+    auth_headers,
+    percentile,
+    print_table,
+    reset_database,
+    seed_users,
+)
+from app.database import AsyncSessionLocal
+from app.models.challenge import Challenge, ChallengeCategory, ChallengeDifficulty
+from app.models.user import User
+from app.services.local_day import local_today
+
+DAYS = 365
+
+ENDPOINTS = (
+    "/challenge/today",
+    "/challenge/history?page_size=10",
+    "/challenge/history?page_size=50",
+    "/user/me",
+    "/user/leaderboard?limit=100",
+)
+
+
+async def seed(users: int) -> None:
+    await reset_database()
+    today = local_today("UTC")
+    async with AsyncSessionLocal() as db:
+        db.add_all(
+            Challenge(
+                title=f"Challenge {i}",
+                description="Pick something you learned this week and explain it in three sentences.",
+                category=ChallengeCategory.LIFE,
+                difficulty=ChallengeDifficulty.MEDIUM,
+                expected_output="A short written explanation",
+                active_date=today - timedelta(days=i),
+                is_active=i == 0,
+                created_at=datetime.utcnow()
+            )
+            for i in range(DAYS)
+        )
+        await db.commit()
+    await seed_users(users)
+
+
+async def drive(client, path: str, headers: list[dict], requests: int, concurrency: int) -> list:
+    """Send `requests` GETs to `path` with `concurrency` in flight."""
+    latencies: list[float] = []
+    remaining = iter(range(requests))
+    
+    async def worker():
+        for i in remaining:
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers[i % len(headers)])
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.text
+    
+    # Warm the caches each endpoint reads
+    for user_headers in headers:
+        await client.get(path, headers=user_headers)
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return [
+        path,
+        f"{requests / elapsed:.0f}",
+        f"{percentile(latencies, 50) * 1000:.2f}",
+        f"{percentile(latencies, 99) * 1000:.2f}",
+    ]
+
+
+async def measure(requests: int, concurrency: int) -> list[list]:
+    """Drive every endpoint against the seeded data."""
+    async with AsyncSessionLocal() as db:
+        users = (await db.execute(select(User))).scalars().all()
+    headers = [{**auth_headers(user), "Accept-Encoding": "identity"} for user in users]
+    async with app_client() as client:
+        return [await drive(client, path, headers, requests, concurrency) for path in ENDPOINTS]
+
+
+def run_child(fast_json: bool, requests: int, concurrency: int) -> list[list]:
+    """Measure in a subprocess with FAST_JSON set as given."""
+    env = dict(os.environ, FAST_JSON="true" if fast_json else "false")
+    output = subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks.endpoint_throughput", "--child",
+            "--requests", str(requests), "--concurrency", str(concurrency),
+        ],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(requests: int, concurrency: int, users: int) -> None:
+    asyncio.run(seed(users))
+    rows = []
+    for fast_json in (False, True):
+        encoder = "orjson" if fast_json else "stdlib"
+        rows += [[row[0], encoder, *row[1:]] for row in run_child(fast_json, requests, concurrency)]
+    rows.sort(key=lambda row: ENDPOINTS.index(row[0]))
+    
+    print(f"\n{requests} requests per endpoint, {concurrency} in flight, {users} users, {DAYS} challenges\n")
+    print_table(["endpoint", "encoder", "requests/s", "p50 ms", "p99 ms"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(asyncio.run(measure(args.requests, args.concurrency))))
+    else:
+        main(args.requests, args.concurrency, args.users)
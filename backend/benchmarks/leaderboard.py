@@ -0,0 +1,128 @@
+"""
+Leaderboard and rank lookups at 1M users.
+
+Times get_leaderboard_entries for several limits with and without
+ix_users_leaderboard, and the rank of a user from the in-memory rank
+index against a COUNT over the users table. Top-N reads through the
+index cost about the same at any table size.
+
+Run with: python -m benchmarks.leaderboard [--users N] [--repeat R]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import func, select, text
+
+from benchmarks.common import percentile, print_table, reset_database
+from app.database import AsyncSessionLocal
+from app.models.user import User
+from app.services.leaderboard import get_leaderboard_entries
+from app.services.ranking import load_rank_index, rank_index
+
+LIMITS = (10, 50, 100)
+
+SEED_USERS = text("""
+    INSERT INTO users (
+        id, username, email, hashed_password, current_streak, longest_streak,
+        total_points, total_submissions, last_completed_date, timezone,
+        completion_bitmap, created_at
+    )
+    SELECT
+        gen_random_uuid(),
+        'user' || i,
+        'user' || i || '@example.com',
+        'x',
+        streak,
+        streak + (i % 7),
+        (random() * 5000)::int,
+        streak,
+        CURRENT_DATE - (i % 10),
+        'UTC',
+        ''::bytea,
+        now()
+    FROM generate_series(1, :users) AS i,
+         LATERAL (SELECT (random() * 30)::int + (i % 2) AS streak) AS s
+""")
+
+
+async def _time(func_, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func_()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _ms(samples: list[float]) -> tuple[str, str]:
+    return f"{statistics.median(samples) * 1000:.2f}", f"{percentile(samples, 99) * 1000:.2f}"
+
+
+async def seed(users: int) -> None:
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        await db.execute(SEED_USERS, {"users": users})
+        await db.commit()
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("ANALYZE users"))
+    print(f"Seeded {users} users in {time.perf_counter() - started:.1f}s")
+
+
+async def leaderboard_rows(repeat: int) -> list[list]:
+    rows = []
+    async with AsyncSessionLocal() as db:
+        for limit in LIMITS:
+            samples = await _time(lambda: get_leaderboard_entries(db, limit), repeat)
+            rows.append([f"top {limit}", "index", *_ms(samples)])
+        await db.commit()
+        
+        # Same reads after dropping the index (rolled back afterwards)
+        await db.execute(text("DROP INDEX ix_users_leaderboard"))
+        for limit in LIMITS:
+            samples = await _time(lambda: get_leaderboard_entries(db, limit), max(3, repeat // 10))
+            rows.append([f"top {limit}", "no index", *_ms(samples)])
+        await db.rollback()
+    return rows
+
+
+async def rank_rows(repeat: int) -> list[list]:
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        await load_rank_index(db)
+        loaded = time.perf_counter() - started
+        
+        points = [random.randint(0, 5000) for _ in range(repeat)]
+        started = time.perf_counter()
+        for value in points:
+            rank_index.rank(value)
+        per_lookup = (time.perf_counter() - started) / repeat
+        
+        samples = []
+        for value in points[:max(3, repeat // 10)]:
+            started = time.perf_counter()
+            await db.execute(select(func.count()).where(User.total_points > value))
+            samples.append(time.perf_counter() - started)
+    return [
+        ["rank", "rank index", f"{per_lookup * 1000:.4f}", "-"],
+        ["rank", "COUNT(*)", *_ms(samples)],
+        ["load rank index", "GROUP BY", f"{loaded * 1000:.0f}", "-"],
+    ]
+
+
+async def main(users: int, repeat: int) -> None:
+    await reset_database()
+    await seed(users)
+    rows = await leaderboard_rows(repeat) + await rank_rows(repeat)
+    print(f"\n{users} users, {repeat} repetitions\n")
+    print_table(["read", "via", "median ms", "p99 ms"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.repeat))
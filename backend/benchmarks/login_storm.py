@@ -0,0 +1,112 @@
+"""
+p99 latency of /challenge/today during a login storm.
+
+Logins verify a bcrypt hash (~200ms of CPU each). With hashing on the
+worker pool the event loop keeps serving reads; the "inline" run
+hashes on the event loop, as before the pool existed, and every read
+waits behind the logins in progress.
+
+Run with: python -m benchmarks.login_storm [--logins N] [--concurrency C]
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import (
+    SEEDED_PASSWORD,
+    app_client,
+    auth_headers,
+    percentile,
+    print_table,
+    reset_database,
+    seed_today_challenge,
+    seed_users,
+)
+from app.services import auth
+
+
+async def _inline_hashing(func, *args):
+    """Hash on the event loop (the behaviour before the worker pool)."""
+    return func(*args)
+
+
+async def _storm(client, users, logins: int, concurrency: int, stats: dict) -> None:
+    """Run `logins` logins with `concurrency` in flight."""
+    queue = asyncio.Queue()
+    for i in range(logins):
+        queue.put_nowait(users[i % len(users)])
+    
+    async def worker():
+        while not queue.empty():
+            user = queue.get_nowait()
+            response = await client.post(
+                "/auth/login",
+                json={"email": user.email, "password": SEEDED_PASSWORD}
+            )
+            stats[response.status_code] = stats.get(response.status_code, 0) + 1
+    
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def _reader(client, headers: dict, done: asyncio.Event, latencies: list[float]) -> None:
+    """Fetch /challenge/today back to back until the storm ends."""
+    while not done.is_set():
+        started = time.perf_counter()
+        response = await client.get("/challenge/today", headers=headers)
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.text
+        await asyncio.sleep(0.005)
+
+
+async def run(mode: str, logins: int, concurrency: int) -> list:
+    await reset_database()
+    await seed_today_challenge()
+    users = await seed_users(max(concurrency, 10))
+    
+    original = auth._run_hashing
+    if mode == "inline":
+        auth._run_hashing = _inline_hashing
+    try:
+        async with app_client() as client:
+            headers = auth_headers(users[0])
+            # Warm the principal and challenge caches
+            await client.get("/challenge/today", headers=headers)
+            
+            latencies: list[float] = []
+            stats: dict[int, int] = {}
+            done = asyncio.Event()
+            reader = asyncio.create_task(_reader(client, headers, done, latencies))
+            started = time.perf_counter()
+            await _storm(client, users, logins, concurrency, stats)
+            elapsed = time.perf_counter() - started
+            done.set()
+            await reader
+    finally:
+        auth._run_hashing = original
+    
+    return [
+        mode,
+        len(latencies),
+        f"{percentile(latencies, 50) * 1000:.1f}",
+        f"{percentile(latencies, 99) * 1000:.1f}",
+        f"{max(latencies) * 1000:.1f}",
+        f"{stats.get(200, 0) / elapsed:.1f}",
+        stats.get(503, 0),
+    ]
+
+
+async def main(logins: int, concurrency: int) -> None:
+    rows = [await run(mode, logins, concurrency) for mode in ("inline", "pool")]
+    print(f"\n{logins} logins, {concurrency} in flight\n")
+    print_table(
+        ["hashing", "reads", "p50 ms", "p99 ms", "max ms", "logins/s", "503s"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.concurrency))
@@ -0,0 +1,23 @@
+"""
+Timing summaries and table output for the benchmark scripts.
+
+Kept apart from benchmarks.common, which needs a database, so
+in-process microbenchmarks can use it too.
+"""
+import math
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100) of non-empty `samples`."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def print_table(headers: list[str], rows: list[list]) -> None:
+    """Print rows as an aligned plain-text table."""
+    cells = [headers] + [[str(cell) for cell in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+    for n, row in enumerate(cells):
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+        if n == 0:
+            print("  ".join("-" * width for width in widths))
@@ -0,0 +1,144 @@
+"""
+Per-response serialization cost of challenge payloads.
+
+Compares building a ChallengeResponse and encoding it the way FastAPI
+does for a response_model route (validate, jsonable_encoder, json.dumps)
+with splicing the per-user flag onto the cached bytes from
+app.services.challenge_payload, for /challenge/today and a 50-item
+/challenge/history page. Both paths must decode to the same JSON.
+Needs no database.
+
+Run with: python -m benchmarks.serialization [--repeat R]
+"""
+import argparse
+import json
+import logging
+import timeit
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from benchmarks.report import print_table
+from app.models.challenge import ChallengeCategory, ChallengeDifficulty
+from app.schemas.challenge import ChallengeHistory, ChallengeResponse
+from app.services.challenge_cache import ChallengeSnapshot
+from app.services.challenge_payload import challenge_json, history_json, payload_cache
+from app.services.local_day import local_today
+
+PAGE_SIZE = 50
+
+logging.disable(logging.WARNING)
+
+
+def make_snapshots(count: int) -> list[ChallengeSnapshot]:
+    """Challenges for the `count` days up to today, newest first."""
+    today = local_today("UTC")
+    return [
+        ChallengeSnapshot(
+            id=uuid.uuid4(),
+            title=f"Day {i}: explain a concept to a friend",
+            description="Pick something you learned this week and explain it in three sentences. " * 4,
+            category=ChallengeCategory.LIFE,
+            difficulty=ChallengeDifficulty.MEDIUM,
+            expected_output="A short written explanation",
+            active_date=today - timedelta(days=i),
+            is_active=i == 0,
+            created_at=datetime(2026, 1, 1, 9, 30),
+            points=20
+        )
+        for i in range(count)
+    ]
+
+
+def _response(challenge: ChallengeSnapshot, user_submitted: bool) -> ChallengeResponse:
+    return ChallengeResponse(
+        id=challenge.id,
+        title=challenge.title,
+        description=challenge.description,
+        category=challenge.category,
+        difficulty=challenge.difficulty,
+        expected_output=challenge.expected_output,
+        active_date=challenge.active_date,
+        is_active=challenge.is_active,
+        created_at=challenge.created_at,
+        points=challenge.points,
+        user_submitted=user_submitted
+    )
+
+
+def _render(model_type, content) -> bytes:
+    """What FastAPI does with a handler's return value and response_model."""
+    validated = model_type.model_validate(content)
+    return JSONResponse(content=jsonable_encoder(validated)).body
+
+
+def today_model(challenge: ChallengeSnapshot) -> bytes:
+    return _render(ChallengeResponse, _response(challenge, True))
+
+
+def today_cached(challenge: ChallengeSnapshot) -> bytes:
+    return challenge_json(challenge, True)
+
+
+def today_cold(challenge: ChallengeSnapshot) -> bytes:
+    payload_cache.clear()
+    return challenge_json(challenge, True)
+
+
+def history_model(challenges: list[ChallengeSnapshot]) -> bytes:
+    return _render(ChallengeHistory, ChallengeHistory(
+        challenges=[_response(challenge, i % 2 == 0) for i, challenge in enumerate(challenges)],
+        total=365,
+        page=1,
+        page_size=PAGE_SIZE,
+        next_cursor="cursor"
+    ))
+
+
+def history_cached(challenges: list[ChallengeSnapshot]) -> bytes:
+    return history_json(
+        [(challenge, i % 2 == 0) for i, challenge in enumerate(challenges)],
+        365,
+        1,
+        PAGE_SIZE,
+        "cursor"
+    )
+
+
+def _us(func, arg, repeat: int) -> float:
+    """Best-of-5 microseconds per call."""
+    return min(timeit.repeat(lambda: func(arg), number=repeat, repeat=5)) / repeat * 1e6
+
+
+def main(repeat: int) -> None:
+    challenges = make_snapshots(PAGE_SIZE)
+    today = challenges[0]
+    
+    assert json.loads(today_model(today)) == json.loads(today_cached(today))
+    assert json.loads(history_model(challenges)) == json.loads(history_cached(challenges))
+    
+    cases = [
+        ("/challenge/today", "model + response_model", today_model, today),
+        ("/challenge/today", "cached bytes (cold)", today_cold, today),
+        ("/challenge/today", "cached bytes", today_cached, today),
+        (f"/challenge/history ({PAGE_SIZE})", "model + response_model", history_model, challenges),
+        (f"/challenge/history ({PAGE_SIZE})", "cached bytes", history_cached, challenges),
+    ]
+    rows = []
+    baseline = {}
+    for endpoint, path, func, arg in cases:
+        micros = _us(func, arg, repeat)
+        baseline.setdefault(endpoint, micros)
+        rows.append([endpoint, path, f"{micros:.1f}", f"{baseline[endpoint] / micros:.0f}x"])
+    
+    print(f"\n{repeat} calls per sample, best of 5\n")
+    print_table(["response", "serialized via", "us/response", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.repeat)
@@ -0,0 +1,173 @@
+"""
+Concurrent submission load test: throughput and no lost point updates.
+
+Two phases, each with many submits in flight:
+- HTTP: every user posts today's challenge twice at once; exactly one
+  must be accepted
+- Service: every user submits several past days' challenges at once
+  through create_submission, so updates to the same user row race
+
+Afterwards every user's total_submissions must equal the number of
+days, and total_points the sum of calculate_points over the challenges:
+with fewer days than STREAK_BONUS_THRESHOLD no streak earns a bonus,
+whatever order the submits land in. Exits 1 if any user differs.
+
+Run with: python -m benchmarks.submit_load [--users N] [--days D] [--concurrency C]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, tuple_
+
+from benchmarks.common import app_client, auth_headers, print_table, reset_database, seed_users
+from app.database import AsyncSessionLocal
+from app.models.challenge import Challenge, ChallengeCategory, ChallengeDifficulty
+from app.models.submission import Submission
+from app.models.user import User
+from app.schemas.submission import SubmissionCreate
+from app.services.challenge_cache import ChallengeSnapshot
+from app.services.local_day import local_today
+from app.services.submission import STREAK_BONUS_THRESHOLD, calculate_points, create_submission
+
+DIFFICULTIES = list(ChallengeDifficulty)
+
+
+async def seed_challenges(days: int) -> list[ChallengeSnapshot]:
+    """Challenges for today and the `days - 1` days before, newest first."""
+    today = local_today("UTC")
+    challenges = [
+        Challenge(
+            title=f"Load test {i}",
+            description="Write down one thing you learned today.",
+            category=ChallengeCategory.LIFE,
+            difficulty=DIFFICULTIES[i % len(DIFFICULTIES)],
+            active_date=today - timedelta(days=i),
+            is_active=i == 0,
+            created_at=datetime.utcnow()
+        )
+        for i in range(days)
+    ]
+    async with AsyncSessionLocal() as db:
+        db.add_all(challenges)
+        await db.commit()
+    return [ChallengeSnapshot.from_challenge(challenge) for challenge in challenges]
+
+
+async def http_phase(users, today_challenge, concurrency: int) -> tuple[float, dict]:
+    """Post today's challenge twice per user at once."""
+    limit = asyncio.Semaphore(concurrency)
+    statuses: dict[int, int] = {}
+    
+    async def submit(client, user):
+        async with limit:
+            response = await client.post(
+                "/challenge/submit",
+                json={"challenge_id": str(today_challenge.id), "content": "done"},
+                headers=auth_headers(user)
+            )
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    
+    async with app_client() as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(submit(client, user) for user in users for _ in range(2)))
+        elapsed = time.perf_counter() - started
+    return elapsed, statuses
+
+
+async def service_phase(users, past_challenges, concurrency: int) -> float:
+    """Submit every past challenge for every user, same-user updates racing."""
+    limit = asyncio.Semaphore(concurrency)
+    
+    async def submit(user, challenge):
+        async with limit:
+            async with AsyncSessionLocal() as db:
+                await create_submission(
+                    db,
+                    user.id,
+                    challenge,
+                    SubmissionCreate(challenge_id=challenge.id, content="done"),
+                    challenge.active_date
+                )
+                await db.commit()
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        submit(user, challenge) for challenge in past_challenges for user in users
+    ))
+    return time.perf_counter() - started
+
+
+def expected_totals(challenges: list[ChallengeSnapshot]) -> tuple[int, int]:
+    """(total_submissions, total_points) every user should end with."""
+    days = len(challenges)
+    return days, sum(calculate_points(challenge.difficulty.value, days) for challenge in challenges)
+
+
+async def mismatched_users(expected: tuple[int, int]) -> tuple[int, int]:
+    """(users whose totals differ from `expected`, submissions stored)."""
+    async with AsyncSessionLocal() as db:
+        mismatched = await db.scalar(
+            select(func.count())
+            .select_from(User)
+            .where(tuple_(User.total_submissions, User.total_points) != expected)
+        )
+        submissions = await db.scalar(select(func.count()).select_from(Submission))
+    return mismatched, submissions
+
+
+async def main(users_count: int, days: int, concurrency: int) -> int:
+    await reset_database()
+    challenges = await seed_challenges(days)
+    users = await seed_users(users_count)
+    
+    http_elapsed, statuses = await http_phase(users, challenges[0], concurrency)
+    service_elapsed = await service_phase(users, challenges[1:], concurrency)
+    expected_submissions, expected_points = expected_totals(challenges)
+    mismatched, submissions = await mismatched_users((expected_submissions, expected_points))
+    
+    service_submits = users_count * (days - 1)
+    print(f"\n{users_count} users, {days} days, {concurrency} in flight\n")
+    print_table(
+        ["phase", "requests", "accepted", "seconds", "requests/s"],
+        [
+            [
+                "HTTP (duplicate pairs)",
+                users_count * 2,
+                statuses.get(201, 0),
+                f"{http_elapsed:.2f}",
+                f"{users_count * 2 / http_elapsed:.0f}",
+            ],
+            [
+                "service (same-user races)",
+                service_submits,
+                service_submits,
+                f"{service_elapsed:.2f}",
+                f"{service_submits / service_elapsed:.0f}" if service_submits else "-",
+            ],
+        ]
+    )
+    print(f"\nHTTP statuses: {dict(sorted(statuses.items()))}")
+    print(f"Submissions: {submissions}")
+    print(f"Expected per user: {expected_submissions} submissions, {expected_points} points")
+    print(f"Users whose totals differ: {mismatched}")
+    
+    expected = users_count * days
+    if mismatched or submissions != expected or statuses.get(201, 0) != users_count:
+        print("FAILED: lost or duplicated updates")
+        return 1
+    print("OK: no lost point updates")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    if not 1 <= args.days < STREAK_BONUS_THRESHOLD:
+        parser.error(f"--days must be between 1 and {STREAK_BONUS_THRESHOLD - 1}")
+    sys.exit(asyncio.run(main(args.users, args.days, args.concurrency)))
@@ -0,0 +1,140 @@
+"""
+Shared fixtures for the backend tests.
+
+Tests that touch the database need a throwaway Postgres database named
+by TEST_DATABASE_URL; every such test drops and recreates its tables.
+Without it those tests are skipped.
+"""
+import os
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import pytest
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL", "")
+if TEST_DATABASE_URL:
+    # Must be set before app.config is imported
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+import httpx  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+
+import app.models  # noqa: E402,F401  (registers every table)
+from app.database import AsyncSessionLocal, create_tables, drop_tables, engine  # noqa: E402
+from app.models.challenge import Challenge, ChallengeCategory, ChallengeDifficulty  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.auth import create_access_token  # noqa: E402
+from app.services.invalidation import resynchronize  # noqa: E402
+
+# bcrypt hash of "secret1", so seeded users skip the slow hashing
+SEEDED_PASSWORD_HASH = "$2b$12$AAupeW0yp2ulzz0kZB4ri.WyTqIesJARfsZH869KGuC/TM9mvccy."
+
+
+class QueryCounter:
+    """Counts statements and fetched rows on the engine while active."""
+    
+    def __init__(self):
+        self.statements = 0
+        self.rows = 0
+        self.active = False
+    
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not self.active:
+            return
+        self.statements += 1
+        # asyncpg cursors hold every fetched row right after execute
+        self.rows += len(getattr(cursor, "_rows", None) or ())
+    
+    @contextmanager
+    def __call__(self):
+        """Count only what runs inside the block."""
+        self.statements = 0
+        self.rows = 0
+        self.active = True
+        try:
+            yield self
+        finally:
+            self.active = False
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def database():
+    """Empty tables and in-process caches."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    await drop_tables()
+    await create_tables()
+    await resynchronize()
+    yield
+    await engine.dispose()
+
+
+@pytest.fixture
+async def db(database):
+    """A session on the test database."""
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+async def client(database):
+    """HTTP client for the app (the lifespan is not run)."""
+    from app.main import app
+    
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        yield http
+
+
+@pytest.fixture
+def query_counter():
+    """Statement and row counter attached to the engine."""
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "after_cursor_execute", counter.after_cursor_execute)
+    yield counter
+    event.remove(engine.sync_engine, "after_cursor_execute", counter.after_cursor_execute)
+
+
+def make_user(username: str, **fields) -> User:
+    """An unsaved user with a known password ("secret1")."""
+    values = {
+        "email": f"{username}@example.com",
+        "hashed_password": SEEDED_PASSWORD_HASH,
+        "current_streak": 0,
+        "longest_streak": 0,
+        "total_points": 0,
+        "total_submissions": 0,
+    }
+    values.update(fields)
+    return User(username=username, **values)
+
+
+def make_challenge(active_date: date, is_active: bool = False, **fields) -> Challenge:
+    """An unsaved easy challenge for `active_date`."""
+    values = {
+        "title": f"Challenge {active_date}",
+        "description": "Write down one thing you learned today.",
+        "category": ChallengeCategory.LIFE,
+        "difficulty": ChallengeDifficulty.EASY,
+        "created_at": datetime.utcnow(),
+    }
+    values.update(fields)
+    return Challenge(active_date=active_date, is_active=is_active, **values)
+
+
+def auth_headers(user: User) -> dict:
+    """Bearer token headers for `user`."""
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': str(user.id)})}"}
+
+
+async def commit_all(db: AsyncSession, *objects) -> None:
+    """Add and commit rows, then refresh the in-process caches."""
+    db.add_all(objects)
+    await db.commit()
+    await resynchronize()
@@ -0,0 +1,69 @@
+"""
+A submission's in-process effects apply only once it commits.
+"""
+import uuid
+
+import pytest
+
+from app.schemas.submission import SubmissionCreate
+from app.services.auth import PrincipalCache, principal_cache
+from app.services.challenge_cache import ChallengeSnapshot
+from app.services.local_day import local_today
+from app.services.ranking import rank_index
+from app.services.submission import create_submission
+from conftest import commit_all, make_challenge, make_user
+
+pytestmark = pytest.mark.anyio
+
+
+def test_store_refuses_fill_that_raced_with_invalidation():
+    cache = PrincipalCache(maxsize=10, ttl=60)
+    user_id, other_id = uuid.uuid4(), uuid.uuid4()
+    
+    version = cache.version(user_id)
+    other_version = cache.version(other_id)
+    cache.invalidate(user_id)
+    
+    assert not cache.store(user_id, "stale", version)
+    assert cache.get(user_id) is None
+    # Other users' fills are unaffected
+    assert cache.store(other_id, "fresh", other_version)
+    
+    version = cache.version(other_id)
+    cache.clear()
+    assert not cache.store(other_id, "stale", version)
+
+
+async def _submit(db, user_id, challenge):
+    await create_submission(
+        db,
+        user_id,
+        challenge,
+        SubmissionCreate(challenge_id=challenge.id, content="done"),
+        local_today("UTC")
+    )
+
+
+async def test_rollback_leaves_caches_and_rank_untouched(db):
+    user = make_user("player")
+    challenge = make_challenge(local_today("UTC"), is_active=True)
+    await commit_all(db, user, challenge)
+    # Rollback expires the ORM objects
+    user_id, challenge = user.id, ChallengeSnapshot.from_challenge(challenge)
+    principal_cache.store(user_id, "cached", principal_cache.version(user_id))
+    rank_version = rank_index.version
+    
+    await _submit(db, user_id, challenge)
+    # Not committed yet: nothing in-process has changed
+    assert principal_cache.get(user_id) == "cached"
+    assert rank_index.version == rank_version
+    
+    await db.rollback()
+    assert principal_cache.get(user_id) == "cached"
+    assert rank_index.version == rank_version
+    
+    await _submit(db, user_id, challenge)
+    await db.commit()
+    assert principal_cache.get(user_id) is None
+    assert rank_index.rank(10) == 1
+    assert rank_index.version > rank_version
@@ -0,0 +1,53 @@
+"""
+/challenge/history costs the same number of queries at any page size.
+"""
+from datetime import timedelta
+
+import pytest
+
+from app.models.submission import Submission
+from app.services.invalidation import resynchronize
+from app.services.local_day import local_today
+from conftest import auth_headers, commit_all, make_challenge, make_user
+
+pytestmark = pytest.mark.anyio
+
+PAST_DAYS = 60
+
+
+async def _seed(db):
+    """PAST_DAYS past challenges, every other one solved by the player."""
+    today = local_today("UTC")
+    challenges = [make_challenge(today - timedelta(days=i)) for i in range(1, PAST_DAYS + 1)]
+    player = make_user("player")
+    db.add_all([*challenges, player])
+    await db.flush()
+    await commit_all(db, *(
+        Submission(user_id=player.id, challenge_id=challenge.id, content="done", points_awarded=10)
+        for challenge in challenges[::2]
+    ))
+    return player
+
+
+async def _statements(client, query_counter, player, page_size: int) -> int:
+    # Cold caches: the principal and the history total are read too
+    await resynchronize()
+    with query_counter() as counter:
+        response = await client.get(
+            f"/challenge/history?page_size={page_size}",
+            headers=auth_headers(player)
+        )
+    assert response.status_code == 200, response.text
+    assert len(response.json()["challenges"]) == page_size
+    return counter.statements
+
+
+async def test_history_statements_do_not_grow_with_page_size(client, db, query_counter):
+    player = await _seed(db)
+    
+    small = await _statements(client, query_counter, player, 1)
+    large = await _statements(client, query_counter, player, 50)
+    
+    assert small == large
+    # Principal, history total and the page itself
+    assert large == 3
@@ -0,0 +1,106 @@
+"""
+Rows fetched per request must not grow with submission volume.
+
+User.submissions and Challenge.submissions are never loaded implicitly,
+so a user's history or a popular challenge does not ride along with
+every read.
+"""
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+
+from app.models.challenge import Challenge
+from app.models.submission import Submission
+from app.models.user import User
+from app.services.invalidation import resynchronize
+from app.services.local_day import local_today
+from conftest import auth_headers, commit_all, make_challenge, make_user
+
+pytestmark = pytest.mark.anyio
+
+PAST_DAYS = 12
+# More than a full leaderboard snapshot
+OTHER_USERS = 150
+
+ENDPOINTS = (
+    "/challenge/today",
+    "/challenge/history?page_size=10",
+    "/user/me",
+    "/user/leaderboard?limit=10",
+)
+
+
+async def _seed(db, today_solvers: int, history_days: int) -> User:
+    """
+    Today's challenge plus PAST_DAYS past ones, the player and
+    OTHER_USERS others; `today_solvers` of the others solved today's
+    challenge and the player solved `history_days` past ones.
+    """
+    today = local_today("UTC")
+    challenges = [make_challenge(today, is_active=True)]
+    challenges += [make_challenge(today - timedelta(days=i)) for i in range(1, PAST_DAYS + 1)]
+    player = make_user("player")
+    others = [make_user(f"other{i}", total_points=10) for i in range(OTHER_USERS)]
+    db.add_all([*challenges, player, *others])
+    await db.flush()
+    
+    submissions = [
+        Submission(user_id=user.id, challenge_id=challenges[0].id, content="done", points_awarded=10)
+        for user in others[:today_solvers]
+    ]
+    submissions += [
+        Submission(user_id=player.id, challenge_id=challenge.id, content="done", points_awarded=10)
+        for challenge in challenges[1:history_days + 1]
+    ]
+    await commit_all(db, *submissions)
+    return player
+
+
+async def _rows_per_endpoint(client, query_counter, player: User) -> dict[str, int]:
+    rows = {}
+    for path in ENDPOINTS:
+        # Cold caches, so every endpoint reads what it needs
+        await resynchronize()
+        with query_counter() as counter:
+            response = await client.get(path, headers=auth_headers(player))
+        assert response.status_code == 200, response.text
+        rows[path] = counter.rows
+    return rows
+
+
+async def test_rows_fetched_with_few_submissions(client, db, query_counter):
+    player = await _seed(db, today_solvers=1, history_days=1)
+    rows = await _rows_per_endpoint(client, query_counter, player)
+    
+    # The user row plus the challenge, the history count and a page
+    # (with one lookahead row), or the leaderboard snapshot; never any
+    # submissions
+    assert rows == {
+        "/challenge/today": 2,
+        "/challenge/history?page_size=10": 13,
+        "/user/me": 1,
+        "/user/leaderboard?limit=10": 100,
+    }
+
+
+async def test_rows_fetched_stay_constant_as_submissions_grow(client, db, query_counter):
+    player = await _seed(db, today_solvers=1, history_days=1)
+    few = await _rows_per_endpoint(client, query_counter, player)
+    
+    # Same page shapes, many more submissions on both sides
+    for table in (Submission.__table__, User.__table__, Challenge.__table__):
+        await db.execute(table.delete())
+    await db.commit()
+    player = await _seed(db, today_solvers=OTHER_USERS, history_days=PAST_DAYS)
+    many = await _rows_per_endpoint(client, query_counter, player)
+    
+    assert many == few
+
+
+async def test_relationships_never_load_implicitly(db):
+    await commit_all(db, make_user("player"))
+    user = (await db.execute(select(User))).scalar_one()
+    with pytest.raises(InvalidRequestError):
+        user.submissions
@@ -0,0 +1,181 @@
+"""
+Two app instances against one Postgres: one scheduler leader, failover,
+and cache invalidation across instances over the event bus.
+
+Each instance is a separate uvicorn process, so they share nothing but
+the database.
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+from sqlalchemy import text
+
+from app.services.local_day import local_today
+from app.services.scheduler import SCHEDULER_LOCK_ID
+from conftest import TEST_DATABASE_URL, auth_headers, commit_all, make_challenge, make_user
+
+pytestmark = pytest.mark.anyio
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Short intervals so failover and reconnects happen within the test
+INSTANCE_ENV = {
+    "DATABASE_URL": TEST_DATABASE_URL,
+    "DEBUG": "false",
+    "SCHEDULER_LEADER_RETRY_SECONDS": "0.5",
+    "EVENT_BUS_HEALTH_CHECK_SECONDS": "0.5",
+}
+
+LOCK_HOLDERS = text("""
+    SELECT pid FROM pg_locks
+    WHERE locktype = 'advisory' AND granted
+      AND classid::bigint * 4294967296 + objid::bigint = :key
+""")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Instance:
+    """A uvicorn process serving the app."""
+    
+    def __init__(self):
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.process = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "app.main:app",
+                "--port", str(self.port), "--log-level", "warning",
+            ],
+            cwd=BACKEND_DIR,
+            env={**os.environ, **INSTANCE_ENV},
+        )
+    
+    async def wait_ready(self, timeout: float = 30.0) -> None:
+        deadline = time.monotonic() + timeout
+        async with httpx.AsyncClient(base_url=self.url) as http:
+            while True:
+                assert self.process.poll() is None, "instance exited during startup"
+                try:
+                    if (await http.get("/health")).status_code == 200:
+                        return
+                except httpx.TransportError:
+                    pass
+                assert time.monotonic() < deadline, "instance did not start"
+                await asyncio.sleep(0.1)
+    
+    def stop(self, crash: bool = False) -> None:
+        if self.process.poll() is not None:
+            return
+        if crash:
+            self.process.kill()
+        else:
+            self.process.terminate()
+        self.process.wait(timeout=30)
+
+
+@asynccontextmanager
+async def running_instances(count: int):
+    """Start `count` instances one after another; the first one leads."""
+    instances = []
+    try:
+        for _ in range(count):
+            instance = Instance()
+            instances.append(instance)
+            await instance.wait_ready()
+        yield instances
+    finally:
+        for instance in instances:
+            instance.stop()
+
+
+async def _lock_holders(db) -> list[int]:
+    result = await db.execute(LOCK_HOLDERS, {"key": SCHEDULER_LOCK_ID})
+    await db.commit()
+    return list(result.scalars())
+
+
+async def _eventually(check, timeout: float = 10.0):
+    """Poll an async `check` until it returns a truthy value."""
+    deadline = time.monotonic() + timeout
+    while True:
+        value = await check()
+        if value or time.monotonic() > deadline:
+            return value
+        await asyncio.sleep(0.1)
+
+
+async def test_one_leader_and_failover(db):
+    async with running_instances(2) as (first, second):
+        holders = await _lock_holders(db)
+        assert len(holders) == 1
+        
+        # The lock goes with the crashed leader's connection
+        first.stop(crash=True)
+        
+        async def new_leader():
+            now = await _lock_holders(db)
+            return now if now and now != holders else None
+        
+        assert len(await _eventually(new_leader)) == 1
+
+
+async def _seed(db):
+    user = make_user("player")
+    challenge = make_challenge(local_today("UTC"), is_active=True)
+    await commit_all(db, user, challenge)
+    return auth_headers(user), challenge.id
+
+
+async def _assert_submit_reaches(listener: Instance, submitter: Instance, headers, challenge_id, points):
+    """Submit on one instance; the other's cached principal must update."""
+    async with httpx.AsyncClient(base_url=listener.url) as a, \
+            httpx.AsyncClient(base_url=submitter.url) as b:
+        # Caches the principal on the listening instance
+        await a.get("/user/me", headers=headers)
+        
+        response = await b.post(
+            "/challenge/submit",
+            json={"challenge_id": str(challenge_id), "content": "done"},
+            headers=headers
+        )
+        assert response.status_code == 201, response.text
+        
+        async def updated():
+            return (await a.get("/user/me", headers=headers)).json()["total_points"] == points
+        
+        assert await _eventually(updated)
+
+
+async def test_submission_invalidates_the_other_instance(db):
+    headers, challenge_id = await _seed(db)
+    async with running_instances(2) as (first, second):
+        await _assert_submit_reaches(first, second, headers, challenge_id, 10)
+
+
+async def test_lock_and_listener_recover_together(db):
+    headers, challenge_id = await _seed(db)
+    async with running_instances(2) as (first, second):
+        # The leader's one dedicated connection carries both
+        holders = await _lock_holders(db)
+        await db.execute(text("SELECT pg_terminate_backend(:pid)"), {"pid": holders[0]})
+        await db.commit()
+        
+        async def relocked():
+            now = await _lock_holders(db)
+            return now if now and now != holders else None
+        
+        assert len(await _eventually(relocked)) == 1
+        # Give the first instance's bus a health check to listen again
+        await asyncio.sleep(1.5)
+        await _assert_submit_reaches(first, second, headers, challenge_id, 10)
@@ -0,0 +1,52 @@
+"""
+/health/pool reports checkout waits and overflow, and only to admins.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import AsyncSessionLocal, engine, max_overflow, pool_metrics
+
+pytestmark = pytest.mark.anyio
+
+ADMIN_KEY = "test-admin-key"
+HOLD_SECONDS = 0.2
+
+
+async def test_pool_status_requires_the_admin_key(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_API_KEY", "")
+    assert (await client.get("/health/pool")).status_code == 404
+    
+    monkeypatch.setattr(settings, "ADMIN_API_KEY", ADMIN_KEY)
+    assert (await client.get("/health/pool")).status_code == 403
+    response = await client.get("/health/pool", headers={"X-Admin-Key": ADMIN_KEY})
+    assert response.status_code == 200
+    assert response.json()["size"] == engine.pool.size()
+
+
+async def test_waiting_for_a_full_pool_is_measured(database):
+    waits, overflow_events = pool_metrics.waits, pool_metrics.overflow_events
+    
+    # Hold every connection the pool can hand out
+    capacity = engine.pool.size() + max_overflow
+    holders = [AsyncSessionLocal() for _ in range(capacity)]
+    for session in holders:
+        await session.execute(text("SELECT 1"))
+    assert pool_metrics.overflow_events - overflow_events == max_overflow
+    
+    async def waiter():
+        async with AsyncSessionLocal() as session:
+            await session.execute(text("SELECT 1"))
+    
+    task = asyncio.create_task(waiter())
+    await asyncio.sleep(HOLD_SECONDS)
+    assert not task.done()
+    await holders.pop().close()
+    await task
+    for session in holders:
+        await session.close()
+    
+    assert pool_metrics.waits - waits == capacity + 1
+    assert pool_metrics.wait_seconds_max >= HOLD_SECONDS
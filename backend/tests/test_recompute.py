@@ -0,0 +1,80 @@
+"""
+Recomputation rewrites drifted stats but never a user who submitted meanwhile.
+"""
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.database import AsyncSessionLocal
+from app.models.user import User
+from app.schemas.submission import SubmissionCreate
+from app.services.challenge_cache import ChallengeSnapshot
+from app.services.local_day import local_today
+from app.services.recompute import (
+    RecomputeReport,
+    _chunk_to_stats,
+    _diff_stats,
+    _write_stats,
+    recompute_user_stats,
+)
+from app.services.submission import create_submission
+from conftest import commit_all, make_challenge, make_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def _submit(user_id, challenge: ChallengeSnapshot) -> None:
+    async with AsyncSessionLocal() as db:
+        await create_submission(
+            db,
+            user_id,
+            challenge,
+            SubmissionCreate(challenge_id=challenge.id, content="done"),
+            challenge.active_date
+        )
+        await db.commit()
+
+
+async def _drift(db, user_id) -> None:
+    await db.execute(update(User).where(User.id == user_id).values(total_points=999, current_streak=0))
+    await db.commit()
+
+
+async def test_skips_users_who_submit_during_the_run(db):
+    today = local_today("UTC")
+    user = make_user("player")
+    challenges = [make_challenge(today - timedelta(days=1)), make_challenge(today, is_active=True)]
+    await commit_all(db, user, *challenges)
+    user_id = user.id
+    yesterday, current = (ChallengeSnapshot.from_challenge(c) for c in challenges)
+    
+    await _submit(user_id, yesterday)
+    await _drift(db, user_id)
+    report = await recompute_user_stats()
+    assert (report.users_changed, report.users_skipped) == (1, 0)
+    await db.refresh(user)
+    assert (user.total_points, user.current_streak) == (10, 1)
+    
+    # Computed from the first submission only; the second lands before
+    # the stored values are read, then after
+    await _drift(db, user_id)
+    stats = _chunk_to_stats([(user_id, yesterday.active_date, yesterday.difficulty)])
+    await _submit(user_id, current)
+    async with AsyncSessionLocal() as writer:
+        changed = await _diff_stats(writer, stats, RecomputeReport(dry_run=False), 0)
+        assert await _write_stats(writer, changed) == 0
+    
+    await _drift(db, user_id)
+    stats = _chunk_to_stats([
+        (user_id, challenge.active_date, challenge.difficulty) for challenge in (yesterday, current)
+    ])
+    async with AsyncSessionLocal() as writer:
+        changed = await _diff_stats(writer, stats, RecomputeReport(dry_run=False), 0)
+        # Points change between the read and the write
+        await db.execute(update(User).where(User.id == user_id).values(total_points=User.total_points + 5))
+        await db.commit()
+        assert await _write_stats(writer, changed) == 0
+    
+    await db.refresh(user)
+    assert user.total_points == 999 + 5
@@ -0,0 +1,58 @@
+"""
+Leaderboard ties rank by the streak shown; expiry catches up on missed runs.
+"""
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.models.user import User
+from app.services.leaderboard import get_leaderboard_entries
+from app.services.local_day import local_today
+from app.services.scheduler import daily_streak_expiry
+from app.services.submission import expire_stale_streaks
+from conftest import commit_all, make_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_ties_on_points_rank_by_effective_streak(db):
+    today = local_today("UTC")
+    await commit_all(
+        db,
+        # Stored streak is higher but broken: it shows and ranks as 0
+        make_user("lapsed", total_points=100, current_streak=9, last_completed_date=today - timedelta(days=5)),
+        make_user("active", total_points=100, current_streak=2, last_completed_date=today - timedelta(days=1)),
+        make_user("leader", total_points=200, current_streak=1, last_completed_date=today),
+    )
+    
+    entries = await get_leaderboard_entries(db, 10)
+    assert [(e.username, e.current_streak) for e in entries] == [
+        ("leader", 1),
+        ("active", 2),
+        ("lapsed", 0),
+    ]
+
+
+async def _streaks(db) -> dict[str, int]:
+    return dict((await db.execute(select(User.username, User.current_streak))).all())
+
+
+async def test_expiry_zeroes_every_broken_streak(db):
+    today = local_today("UTC")
+    await commit_all(
+        db,
+        *(
+            make_user(f"days{age}", current_streak=3, last_completed_date=today - timedelta(days=age))
+            for age in (1, 2, 3, 10)
+        )
+    )
+    
+    # Also the ones a missed run would have expired, in the caller's transaction
+    assert await expire_stale_streaks(db, today) == 2
+    await db.rollback()
+    assert await _streaks(db) == {"days1": 3, "days2": 3, "days3": 3, "days10": 3}
+    
+    # The scheduled job commits it
+    await daily_streak_expiry()
+    assert await _streaks(db) == {"days1": 3, "days2": 3, "days3": 0, "days10": 0}
@@ -0,0 +1,73 @@
+"""
+Concurrent submits never lose or duplicate a points update.
+
+A smaller version of benchmarks/submit_load.py.
+"""
+import asyncio
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.models.challenge import ChallengeDifficulty
+from app.models.user import User
+from app.schemas.submission import SubmissionCreate
+from app.services.challenge_cache import ChallengeSnapshot
+from app.services.local_day import local_today
+from app.services.submission import STREAK_BONUS_THRESHOLD, calculate_points, create_submission
+from conftest import commit_all, make_challenge, make_user
+
+pytestmark = pytest.mark.anyio
+
+USERS = 10
+DAYS = 4
+DIFFICULTIES = list(ChallengeDifficulty)
+
+
+async def _submit(user_id, challenge: ChallengeSnapshot) -> bool:
+    async with AsyncSessionLocal() as db:
+        try:
+            await create_submission(
+                db,
+                user_id,
+                challenge,
+                SubmissionCreate(challenge_id=challenge.id, content="done"),
+                challenge.active_date
+            )
+        except ValueError:
+            return False
+        await db.commit()
+        return True
+
+
+async def test_concurrent_submits_keep_totals_exact(db):
+    today = local_today("UTC")
+    challenges = [
+        make_challenge(today - timedelta(days=i), difficulty=DIFFICULTIES[i % len(DIFFICULTIES)])
+        for i in range(DAYS)
+    ]
+    users = [make_user(f"player{i}") for i in range(USERS)]
+    await commit_all(db, *challenges, *users)
+    snapshots = [ChallengeSnapshot.from_challenge(challenge) for challenge in challenges]
+    user_ids = [user.id for user in users]
+    
+    # Every day at once for every user, each one twice
+    accepted = await asyncio.gather(*(
+        _submit(user_id, snapshot)
+        for snapshot in snapshots
+        for user_id in user_ids
+        for _ in range(2)
+    ))
+    assert sum(accepted) == USERS * DAYS
+    
+    # Streaks stay below the bonus threshold whatever order the days land
+    # in, so every user earns each challenge's points without a bonus
+    assert DAYS < STREAK_BONUS_THRESHOLD
+    points = sum(calculate_points(challenge.difficulty.value, DAYS) for challenge in challenges)
+    expected = {user_id: (DAYS, points) for user_id in user_ids}
+    stored = {
+        row.id: (row.total_submissions, row.total_points)
+        for row in await db.execute(select(User.id, User.total_submissions, User.total_points))
+    }
+    assert stored == expected
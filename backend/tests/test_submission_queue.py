@@ -0,0 +1,219 @@
+"""
+Write-behind spill files: one per worker, adopted only from exited workers.
+Points are computed when a batch is written, and rows the database
+refuses are set aside instead of blocking the queue.
+"""
+import dataclasses
+import json
+import os
+import subprocess
+import sys
+import uuid
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models.submission import Submission
+from app.schemas.submission import SubmissionCreate
+from app.services.auth import PRINCIPAL_COLUMNS, Principal
+from app.services.local_day import local_today
+from app.services.submission import STREAK_BONUS, STREAK_BONUS_THRESHOLD
+from app.services.submission_queue import REJECTED_FILE, PendingSubmission, SubmissionQueue
+from conftest import commit_all, make_challenge, make_user
+
+pytestmark = pytest.mark.anyio
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# A worker that acknowledges submissions, then dies without flushing
+CRASHING_WORKER = """
+import asyncio, json, os, sys
+from uuid import UUID
+from sqlalchemy import select
+from app.database import AsyncSessionLocal
+from app.models.challenge import Challenge
+from app.models.user import User
+from app.schemas.submission import SubmissionCreate
+from app.services.auth import PRINCIPAL_COLUMNS, Principal
+from app.services.submission_queue import SubmissionQueue
+
+async def main(spill_dir, challenge_id, user_ids):
+    async with AsyncSessionLocal() as db:
+        challenge = await db.get(Challenge, UUID(challenge_id))
+        principals = [
+            Principal(*(await db.execute(select(*PRINCIPAL_COLUMNS).where(User.id == UUID(user_id)))).one())
+            for user_id in user_ids
+        ]
+    # No await from here on, so the background flusher never runs
+    queue = SubmissionQueue(100, 100, 3600.0, spill_dir=spill_dir, spill_fsync=False)
+    await queue.start()
+    for principal in principals:
+        queue.submit(principal, challenge, SubmissionCreate(challenge_id=challenge.id, content="done"))
+    print(len(queue), flush=True)
+    os._exit(0)
+
+asyncio.run(main(sys.argv[1], sys.argv[2], json.loads(sys.argv[3])))
+"""
+
+
+def _queue(spill_dir, batch_size: int = 10) -> SubmissionQueue:
+    return SubmissionQueue(
+        max_size=100,
+        batch_size=batch_size,
+        flush_interval=3600.0,
+        spill_dir=str(spill_dir),
+        spill_fsync=False
+    )
+
+
+def _principal(user) -> Principal:
+    return Principal(*(getattr(user, column.key) for column in PRINCIPAL_COLUMNS))
+
+
+def _submission(challenge) -> SubmissionCreate:
+    return SubmissionCreate(challenge_id=challenge.id, content="done")
+
+
+async def _seed(db, users: int):
+    challenge = make_challenge(local_today("UTC"), is_active=True)
+    players = [make_user(f"player{i}") for i in range(users)]
+    await commit_all(db, challenge, *players)
+    return players, challenge
+
+
+def _run_crashing_worker(spill_dir, challenge, users) -> int:
+    """Run a worker process that exits without flushing; returns its queue length."""
+    output = subprocess.run(
+        [
+            sys.executable, "-c", CRASHING_WORKER,
+            str(spill_dir), str(challenge.id), json.dumps([str(user.id) for user in users]),
+        ],
+        cwd=BACKEND_DIR,
+        check=True,
+        capture_output=True,
+        text=True
+    ).stdout
+    return int(output.split()[-1])
+
+
+def _spill_files(spill_dir) -> list[str]:
+    return sorted(name for name in os.listdir(spill_dir) if name.startswith("spill-"))
+
+
+async def _written(db) -> int:
+    return await db.scalar(select(func.count()).select_from(Submission))
+
+
+async def test_each_worker_spills_to_its_own_file(db, tmp_path):
+    (alice, bob), challenge = await _seed(db, 2)
+    first, second = _queue(tmp_path), _queue(tmp_path)
+    await first.start()
+    await second.start()
+    first.submit(_principal(alice), challenge, _submission(challenge))
+    second.submit(_principal(bob), challenge, _submission(challenge))
+    
+    assert _spill_files(tmp_path) == sorted(
+        os.path.basename(queue.spill_path) for queue in (first, second)
+    )
+    
+    # A clean stop writes everything and leaves no file behind
+    await first.stop()
+    await second.stop()
+    assert _spill_files(tmp_path) == []
+    assert await _written(db) == 2
+
+
+async def test_live_workers_files_are_not_adopted(db, tmp_path):
+    users, challenge = await _seed(db, 3)
+    live = _queue(tmp_path, batch_size=1)
+    await live.start()
+    for user in users:
+        live.submit(_principal(user), challenge, _submission(challenge))
+    # Writing a batch swaps the file for a new, already locked one
+    assert await live.flush() == 1
+    
+    starting = _queue(tmp_path)
+    await starting.start()
+    assert len(starting) == 0
+    assert os.path.exists(live.spill_path)
+    
+    await starting.stop()
+    await live.stop()
+    assert await _written(db) == 3
+
+
+async def test_exited_workers_files_are_adopted_once(db, tmp_path):
+    users, challenge = await _seed(db, 3)
+    assert _run_crashing_worker(tmp_path, challenge, users) == 3
+    # The records survive their adopter exiting in turn
+    assert _run_crashing_worker(tmp_path, challenge, []) == 3
+    assert len(_spill_files(tmp_path)) == 1
+    
+    first = _queue(tmp_path)
+    await first.start()
+    assert len(first) == 3
+    # The records now live only in the adopter's file
+    assert _spill_files(tmp_path) == [os.path.basename(first.spill_path)]
+    
+    second = _queue(tmp_path)
+    await second.start()
+    assert len(second) == 0
+    
+    await second.stop()
+    await first.stop()
+    assert await _written(db) == 3
+
+
+async def test_points_are_computed_when_written(db, tmp_path):
+    today = local_today("UTC")
+    # One more day completes a bonus streak
+    user = make_user(
+        "player",
+        current_streak=STREAK_BONUS_THRESHOLD - 1,
+        last_completed_date=today - timedelta(days=1)
+    )
+    challenge = make_challenge(today, is_active=True)
+    await commit_all(db, user, challenge)
+    
+    queue = _queue(tmp_path)
+    await queue.start()
+    # A stale cached principal that has not seen the streak yet
+    stale = dataclasses.replace(_principal(user), current_streak=0, last_completed_date=None)
+    pending = queue.submit(stale, challenge, _submission(challenge))
+    assert await queue.flush() == 1
+    await queue.stop()
+    
+    stored = await db.scalar(select(Submission.points_awarded))
+    assert stored == pending.points_awarded + STREAK_BONUS
+    await db.refresh(user)
+    assert (user.total_points, user.current_streak) == (stored, STREAK_BONUS_THRESHOLD)
+
+
+async def test_bad_row_is_set_aside_and_the_rest_written(db, tmp_path):
+    (user,), challenge = await _seed(db, 1)
+    # Its user does not exist: the foreign key fails the batch INSERT
+    ghost = make_user("ghost", id=uuid.uuid4(), timezone="UTC")
+    
+    queue = _queue(tmp_path)
+    await queue.start()
+    bad = queue.submit(_principal(ghost), challenge, _submission(challenge))
+    good = queue.submit(_principal(user), challenge, _submission(challenge))
+    
+    assert await queue.flush() == 2
+    assert len(queue) == 0
+    assert queue.rejected_count == 1
+    await queue.stop()
+    
+    written = (await db.execute(select(Submission.id))).scalars().all()
+    assert written == [good.id]
+    await db.refresh(user)
+    assert (user.total_points, user.total_submissions) == (good.points_awarded, 1)
+    
+    with open(tmp_path / REJECTED_FILE, encoding="utf-8") as f:
+        assert [PendingSubmission.from_json(line).id for line in f] == [bad.id]
+    # Neither row is replayed by the next worker
+    following = _queue(tmp_path)
+    await following.start()
+    assert len(following) == 0
+    await following.stop()